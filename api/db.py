@@ -1,6 +1,6 @@
 import asyncio
 import time
-from typing import Union
+from typing import Any, Awaitable, Callable, Union
 
 from prisma import Prisma
 
@@ -54,3 +54,16 @@ async def connect(reconnect: bool = False):
 
     return prisma
 
+
+
+async def advisory_lock(transaction: Prisma, key: str):
+    # held until the end of the transaction, by all the processes that lock the same key
+    await transaction.query_raw('SELECT 1 AS locked FROM pg_advisory_xact_lock(hashtext($1))', key)
+
+
+async def create_once(prisma: Prisma, key: str, find: Callable[[Any], Awaitable[Any]], create: Callable[[Any], Awaitable[Any]]) -> Any:
+    # the lock makes the workers that miss the same entry create it only once
+    async with prisma.tx() as transaction:
+        await advisory_lock(transaction, key)
+        existing = await find(transaction)
+        return existing if existing is not None else await create(transaction)
@@ -0,0 +1,127 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Set
+
+from prisma import Prisma
+
+from api.db import advisory_lock
+from libs.profiler import waiting
+
+MAX_EMPLOYERS = 10000
+
+
+class EmployerResolver:
+    """
+    Ids of the employers by name, kept for the life of the process. The cache is
+    warmed with the employers of a scraper the first time one of its runs saves a
+    job, the names it does not know are looked up and created together.
+    Concurrent records of the same new employer wait for one creation, and the
+    workers creating the same names wait for each other under advisory locks.
+    """
+
+    def __init__(self, max_size: int = MAX_EMPLOYERS):
+        self.max_size = max_size
+        self.ids: OrderedDict[str, int] = OrderedDict()
+        self.inflight: Dict[str, asyncio.Future[int]] = {}
+        self.warmed: Set[int] = set()
+
+    def remember(self, name: str, id: int):
+        self.ids[name] = id
+        self.ids.move_to_end(name)
+        if len(self.ids) > self.max_size:
+            self.ids.popitem(last=False)
+
+    async def warm(self, prisma: Prisma, scraper_id: int):
+        if scraper_id in self.warmed:
+            return
+        self.warmed.add(scraper_id)
+
+        with waiting("db"):
+            employers = await prisma.employer.find_many(
+                where={"scraperId": scraper_id},
+                order={"id": "desc"},
+                take=self.max_size
+            )
+
+        # the oldest employer of a name wins, same as looking it up
+        for employer in employers:
+            self.remember(employer.name, employer.id)
+
+    async def resolve(self, prisma: Prisma, employers: List[Dict[str, Any]]) -> Dict[str, int]:
+        # employers are the data to create them with when they do not exist
+        ids: Dict[str, int] = {}
+        waiting_for: Dict[str, asyncio.Future[int]] = {}
+        missing: Dict[str, Dict[str, Any]] = {}
+
+        for employer in employers:
+            name = employer["name"]
+            if name in ids or name in waiting_for or name in missing:
+                continue
+            if name in self.ids:
+                self.ids.move_to_end(name)
+                ids[name] = self.ids[name]
+            elif name in self.inflight:
+                waiting_for[name] = self.inflight[name]
+            else:
+                missing[name] = employer
+
+        if len(missing) > 0:
+            ids.update(await self.lookup(prisma, missing))
+
+        for name, future in waiting_for.items():
+            ids[name] = await asyncio.shield(future)
+
+        return ids
+
+    @staticmethod
+    async def find(prisma: Prisma, names: List[str], ids: Dict[str, int]):
+        # the oldest employer of a name wins
+        for employer in await prisma.employer.find_many(where={"name": {"in": names}}, order={"id": "asc"}):
+            if employer.name not in ids:
+                ids[employer.name] = employer.id
+
+    async def lookup(self, prisma: Prisma, missing: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        loop = asyncio.get_running_loop()
+        futures = {name: loop.create_future() for name in missing}
+        self.inflight.update(futures)
+
+        try:
+            ids: Dict[str, int] = {}
+            with waiting("db"):
+                await self.find(prisma, list(missing), ids)
+
+                names = sorted(name for name in missing if name not in ids)
+                if len(names) > 0:
+                    # other workers may miss the same names, they wait for the locks and find them
+                    async with prisma.tx() as transaction:
+                        for name in names:
+                            await advisory_lock(transaction, f"employer:{name}")
+                        await self.find(transaction, names, ids)
+
+                        created = [missing[name] for name in names if name not in ids]
+                        if len(created) > 0:
+                            await transaction.employer.create_many(data=created)  # type: ignore
+                            await self.find(transaction, [x["name"] for x in created], ids)
+
+            for name in missing:
+                if name not in ids:
+                    raise Exception(f"Could not create employer {name}")
+
+            for name, id in ids.items():
+                self.remember(name, id)
+                futures[name].set_result(id)
+            return ids
+        except BaseException as e:
+            for future in futures.values():
+                if future.done():
+                    continue
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+                    # nobody may be waiting for this employer
+                    future.exception()
+            raise
+        finally:
+            for name in futures:
+                del self.inflight[name]
@@ -0,0 +1,124 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+
+from prisma import Prisma
+
+from api.db import connect
+from api.employers import EmployerResolver
+from libs.profiler import waiting
+
+# called with the error when the job of a record cannot be created
+JobFailed = Callable[[Exception], Awaitable[None]]
+# employer to create when it does not exist, job without its employer and the report of its record
+PendingJob = Tuple[Dict[str, Any] | None, Dict[str, Any], JobFailed]
+
+
+async def create_job(prisma: Prisma, employers: EmployerResolver, employer: Dict[str, Any] | None, data: Dict[str, Any]):
+    if employer is not None:
+        employer_id = (await employers.resolve(prisma, [employer]))[employer["name"]]
+    else:
+        employer_id = 0
+
+    with waiting("db"):
+        await prisma.job.create(data={**data, "employerId": employer_id})  # type: ignore
+
+
+class JobBatch:
+    """
+    Jobs saved by the records of a process, written together when the batch is full,
+    when its oldest job has waited `interval` seconds, when the worker has no task or
+    when the run ends. Records do not wait for the write, so a batch gathers the
+    records of many worker tasks. The jobs of a batch are created in one transaction,
+    when it fails they are created one by one and only the records of the failing
+    jobs are reported.
+    """
+
+    def __init__(self, size: int, interval: float, employers: EmployerResolver):
+        self.size = size
+        self.interval = interval
+        self.employers = employers
+        self.pending: List[PendingJob] = []
+        self.timer: asyncio.TimerHandle | None = None
+        self.flushing: Set[asyncio.Task[None]] = set()
+
+    def save(self, employer: Dict[str, Any] | None, data: Dict[str, Any], failed: JobFailed):
+        self.pending.append((employer, data, failed))
+
+        if len(self.pending) >= self.size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.interval, self.flush)
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        if len(self.pending) == 0:
+            return
+
+        task = asyncio.create_task(self.write(self.pending))
+        self.flushing.add(task)
+        task.add_done_callback(self.flushing.discard)
+        self.pending = []
+
+    async def settle(self):
+        # waits for the batches being written, e.g. before the connection is closed
+        while len(self.flushing) > 0:
+            await asyncio.gather(*self.flushing)
+
+    async def finish(self):
+        # writes the last partial batch
+        self.flush()
+        await self.settle()
+
+    async def write(self, batch: List[PendingJob]):
+        prisma = await connect()
+
+        try:
+            employers = await self.employers.resolve(
+                prisma, [employer for employer, _, _ in batch if employer is not None])
+            with waiting("db"):
+                async with prisma.batch_() as batcher:
+                    for employer, data, _ in batch:
+                        batcher.job.create(data={  # type: ignore
+                            **data,
+                            "employerId": employers[employer["name"]] if employer is not None else 0
+                        })
+        except Exception:
+            for employer, data, failed in batch:
+                try:
+                    await create_job(prisma, self.employers, employer, data)
+                except Exception as e:
+                    try:
+                        await failed(e)
+                    except Exception as report_error:
+                        print(f"NOT Ω Could not report the job that failed to save: {report_error}")
+
+
+class JobBatches:
+    """
+    Batches of the jobs saved in the process, by their size and interval.
+    """
+
+    def __init__(self, employers: EmployerResolver):
+        self.employers = employers
+        self.batches: Dict[Tuple[int, float], JobBatch] = {}
+
+    def get(self, size: int, interval: float) -> JobBatch:
+        if (size, interval) not in self.batches:
+            self.batches[(size, interval)] = JobBatch(size, interval, self.employers)
+        return self.batches[(size, interval)]
+
+    def idle_interval(self) -> float | None:
+        # how long a worker without a task waits before it writes the pending jobs
+        intervals = [x.interval for x in self.batches.values() if len(x.pending) > 0 or len(x.flushing) > 0]
+        return min(intervals) if len(intervals) > 0 else None
+
+    async def settle(self):
+        for batch in list(self.batches.values()):
+            await batch.settle()
+
+    async def finish(self):
+        for batch in list(self.batches.values()):
+            await batch.finish()
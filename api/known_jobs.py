@@ -0,0 +1,116 @@
+import hashlib
+import math
+from typing import Dict, List
+
+from prisma import Prisma
+
+from libs.profiler import waiting
+
+# rows of the processed jobs read per query
+PAGE_SIZE = 100000
+
+
+class BloomFilter:
+    """
+    Set of strings that answers "maybe" or "no": there are no false negatives and
+    about `error_rate` false positives while it holds at most `capacity` strings,
+    in about ten bits per string.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1024)
+        self.size = int(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+class KnownJobs:
+    """
+    Processed jobs known to the process, to skip the lookup of listing items that
+    were already processed. The jobs of the scrapers that ran in the process are
+    kept with their ids, all the others only in a Bloom filter. The index is
+    brought up to date with the new rows at the start of every run.
+    """
+
+    def __init__(self):
+        self.filter: BloomFilter | None = None
+        self.scrapers: Dict[int, Dict[str, int]] = {}
+        self.last_id = 0
+        self.rows = 0
+
+    async def refresh(self, prisma: Prisma, scraper_id: int):
+        with waiting("db"):
+            count = await prisma.processedjob.count()
+
+        # first run, rows were deleted or the filter is full
+        if self.filter is None or count < self.rows or count > self.filter.capacity:
+            self.filter = BloomFilter(2 * count)
+            self.scrapers = {scraper: {} for scraper in self.scrapers}
+            self.last_id = 0
+            self.rows = 0
+
+        while True:
+            with waiting("db"):
+                rows = await prisma.query_raw(
+                    'SELECT id, "jobId", scraper FROM "ProcessedJob" WHERE id > $1 ORDER BY id LIMIT $2',
+                    self.last_id, PAGE_SIZE)
+
+            for row in rows:
+                self.filter.add(row["jobId"])
+                if row["scraper"] in self.scrapers:
+                    self.scrapers[row["scraper"]].setdefault(row["jobId"], row["id"])
+                self.last_id = row["id"]
+            self.rows += len(rows)
+
+            if len(rows) < PAGE_SIZE:
+                break
+
+        if scraper_id not in self.scrapers:
+            # the ids of this scraper, the new rows are already in the filter
+            jobs: Dict[str, int] = {}
+            with waiting("db"):
+                rows = await prisma.query_raw(
+                    'SELECT id, "jobId" FROM "ProcessedJob" WHERE scraper = $1 AND id <= $2 ORDER BY id',
+                    scraper_id, self.last_id)
+            for row in rows:
+                jobs.setdefault(row["jobId"], row["id"])
+            self.scrapers[scraper_id] = jobs
+
+    async def lookup(self, prisma: Prisma, job_ids: List[str]) -> Dict[str, int]:
+        # ids of the jobs processed by any scraper, without the data of their rows
+        jobs: Dict[str, int] = {}
+        with waiting("db"):
+            rows = await prisma.query_raw(
+                'SELECT id, "jobId" FROM "ProcessedJob" WHERE "jobId" = ANY($1::text[]) ORDER BY id', job_ids)
+        for row in rows:
+            jobs.setdefault(row["jobId"], row["id"])
+        return jobs
+
+    def find(self, scraper_id: int, job_id: str) -> int | None:
+        # id of a job processed by the scraper
+        jobs = self.scrapers[scraper_id] if scraper_id in self.scrapers else None
+        return jobs[job_id] if jobs is not None and job_id in jobs else None
+
+    def maybe(self, job_id: str) -> bool:
+        # False when no scraper has processed the job
+        return self.filter is None or job_id in self.filter
+
+    def add(self, scraper_id: int, job_id: str, id: int):
+        # rows are counted when the next refresh reads them
+        if self.filter is not None:
+            self.filter.add(job_id)
+        if scraper_id in self.scrapers:
+            self.scrapers[scraper_id].setdefault(job_id, id)
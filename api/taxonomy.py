@@ -0,0 +1,202 @@
+import asyncio
+from typing import Dict, List, Tuple
+
+from prisma import Prisma
+
+from api.db import advisory_lock, create_once
+from libs.profiler import waiting
+
+
+class Role:
+    __slots__ = ("id", "name", "alternative_names", "parent_id", "industry_id")
+
+    def __init__(self, id: int, name: str, alternative_names: List[str], parent_id: int | None, industry_id: int):
+        self.id = id
+        self.name = name
+        self.alternative_names = alternative_names
+        self.parent_id = parent_id
+        self.industry_id = industry_id
+
+
+class TaxonomyIndex:
+    """
+    Skills, job roles and industries of a family by their names and alternative
+    names, loaded once per process to resolve the output of Gemini without queries.
+    Entries missing from the index are looked up again and created under a lock,
+    so that an entry created by another worker since the load is not duplicated.
+    """
+
+    def __init__(self, family: str):
+        self.family = family
+        self.loaded = False
+        self.loading = asyncio.Lock()
+        self.skills: Dict[str, Dict[str, int]] = {}
+        self.industries: Dict[str, int] = {}
+        self.roles: Dict[int, Role] = {}
+        self.role_names: Dict[str, int] = {}
+        # roles by their cluster and industry, to find a role by its titles
+        self.role_children: Dict[Tuple[int | None, int], Dict[str, int]] = {}
+
+    async def load(self, prisma: Prisma):
+        # concurrent records of the first run wait for one load
+        async with self.loading:
+            if not self.loaded:
+                await self.read(prisma)
+
+    async def read(self, prisma: Prisma):
+        with waiting("db"):
+            skills = await prisma.query_raw(
+                'SELECT id, type, name, "alternativeNames" FROM "Skill" WHERE "familyId" = $1 ORDER BY id', self.family)
+            roles = await prisma.query_raw(
+                'SELECT id, name, "alternativeNames", "parentId", "industryId" FROM "JobRole" WHERE "familyId" = $1 ORDER BY id', self.family)
+            industries = await prisma.query_raw(
+                'SELECT id, name, "alternativeNames" FROM "Industry" ORDER BY id')
+
+        # the oldest entry of a name wins, same as looking it up
+        for row in skills:
+            self.add_skill(row["type"], row["id"], row["name"], row["alternativeNames"] or [])
+        for row in roles:
+            self.add_role(Role(row["id"], row["name"], row["alternativeNames"] or [], row["parentId"], row["industryId"]))
+        for row in industries:
+            self.add_industry(row["id"], row["name"], row["alternativeNames"] or [])
+
+        self.loaded = True
+
+    def add_skill(self, skill_type: str, id: int, name: str, alternative_names: List[str]):
+        names = self.skills.setdefault(skill_type, {})
+        for x in [name, *alternative_names]:
+            names.setdefault(x, id)
+
+    def add_industry(self, id: int, name: str, alternative_names: List[str]):
+        for x in [name, *alternative_names]:
+            self.industries.setdefault(x, id)
+
+    def add_role(self, role: Role):
+        self.roles[role.id] = role
+        children = self.role_children.setdefault((role.parent_id, role.industry_id), {})
+        for x in [role.name, *role.alternative_names]:
+            self.role_names.setdefault(x, role.id)
+            children.setdefault(x, role.id)
+
+    async def skill(self, prisma: Prisma, skill_type: str, name: str, parent_id: int | None) -> int:
+        names = self.skills.setdefault(skill_type, {})
+        if name in names:
+            return names[name]
+
+        where = {
+            "OR": [{"name": name}, {"alternativeNames": {"has": name}}],
+            "type": skill_type,
+            "familyId": self.family
+        }
+        with waiting("db"):
+            skill = await create_once(
+                prisma,
+                f"skill:{self.family}:{skill_type}:{name}",
+                lambda tx: tx.skill.find_first(where=where, order={"id": "asc"}),
+                lambda tx: tx.skill.create({
+                    "name": name,
+                    "familyId": self.family,
+                    "parentSkillId": parent_id,
+                    "type": skill_type,
+                })
+            )
+
+        self.add_skill(skill_type, skill.id, skill.name, skill.alternativeNames or [])
+        return names[name] if name in names else skill.id
+
+    async def industry(self, prisma: Prisma, name: str) -> int:
+        if name in self.industries:
+            return self.industries[name]
+
+        with waiting("db"):
+            industry = await create_once(
+                prisma,
+                f"industry:{name}",
+                lambda tx: tx.industry.find_first(where={
+                    "OR": [{"name": name}, {"alternativeNames": {"has": name}}]
+                }, order={"id": "asc"}),
+                lambda tx: tx.industry.create({"name": name})
+            )
+
+        self.add_industry(industry.id, industry.name, industry.alternativeNames or [])
+        return industry.id
+
+    async def cluster(self, prisma: Prisma, name: str, industry_id: int) -> int:
+        if name in self.role_names:
+            return self.role_names[name]
+
+        with waiting("db"):
+            role = await create_once(
+                prisma,
+                f"role:{self.family}:{name}",
+                lambda tx: tx.jobrole.find_first(where={
+                    "OR": [{"name": name}, {"alternativeNames": {"has": name}}],
+                    "familyId": self.family
+                }, order={"id": "asc"}),
+                lambda tx: tx.jobrole.create({
+                    "name": name,
+                    "familyId": self.family,
+                    "industryId": industry_id
+                })
+            )
+
+        self.add_role(Role(role.id, role.name, role.alternativeNames or [], role.parentId, role.industryId))
+        return role.id
+
+    async def role(self, prisma: Prisma, titles: List[str], parent_id: int, industry_id: int) -> int:
+        children = self.role_children.setdefault((parent_id, industry_id), {})
+        found = next((children[x] for x in titles if x in children), None)
+
+        if found is not None:
+            role = self.roles[found]
+            if all(x == role.name or x in role.alternative_names for x in titles):
+                return role.id
+            await self.merge_titles(prisma, role.id, titles)
+            return role.id
+
+        where = {
+            "OR": [{"name": {"in": titles}}, {"alternativeNames": {"has_some": titles}}],
+            "parentId": parent_id,
+            "industryId": industry_id,
+            "familyId": self.family
+        }
+        with waiting("db"):
+            created = await create_once(
+                prisma,
+                f"role:{self.family}:{parent_id}:{industry_id}:{titles[0]}",
+                lambda tx: tx.jobrole.find_first(where=where, order={"id": "asc"}),
+                lambda tx: tx.jobrole.create({
+                    "familyId": self.family,
+                    "name": titles[0],
+                    "alternativeNames": titles[1:],
+                    "parentId": parent_id,
+                    "industryId": industry_id
+                })
+            )
+
+        self.add_role(Role(created.id, created.name, created.alternativeNames or [], created.parentId, created.industryId))
+        if not all(x == created.name or x in created.alternativeNames for x in titles):
+            await self.merge_titles(prisma, created.id, titles)
+        return created.id
+
+    async def merge_titles(self, prisma: Prisma, id: int, titles: List[str]):
+        # the titles are added to the alternative names read under the lock, other workers may have added some
+        with waiting("db"):
+            async with prisma.tx() as transaction:
+                await advisory_lock(transaction, f"role:{self.family}:{id}")
+                current = await transaction.jobrole.find_unique(where={"id_familyId": {"id": id, "familyId": self.family}})
+                if current is None:
+                    return
+
+                alternative_names = [*current.alternativeNames]
+                for title in titles:
+                    if title != current.name and title not in alternative_names:
+                        alternative_names.append(title)
+
+                if len(alternative_names) != len(current.alternativeNames):
+                    await transaction.jobrole.update(
+                        where={"id_familyId": {"id": id, "familyId": self.family}},
+                        data={"alternativeNames": alternative_names}
+                    )
+
+        self.add_role(Role(id, current.name, alternative_names, current.parentId, current.industryId))
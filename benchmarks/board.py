@@ -0,0 +1,156 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+WORDS = [
+    "customer", "service", "team", "experience", "skills", "role", "support", "management",
+    "project", "data", "software", "sales", "health", "care", "safety", "training", "reporting",
+    "stakeholder", "communication", "analysis", "planning", "delivery", "quality", "systems"
+]
+
+STATES = ["NSW", "VIC", "QLD", "WA", "SA", "TAS", "ACT", "NT"]
+
+
+class BoardOptions:
+    def __init__(self, pages: int = 5, per_page: int = 20, paragraphs: int = 8, latency: float = 0):
+        self.pages = pages
+        self.per_page = per_page
+        # size of the job descriptions
+        self.paragraphs = paragraphs
+        # seconds added to every response
+        self.latency = latency
+        # job ids are unique for every start of the board so that runs are not deduplicated
+        self.token = str(int(time.time() * 1000))
+
+
+class FakeBoard:
+    """
+    Local job board serving paginated listings and job details, as JSON:
+
+        /api/jobs?page=1        listing with `results` and `total`
+        /api/jobs/<id>          job detail
+
+    and as HTML:
+
+        /jobs?page=1            listing with links to `/job/<id>`
+        /job/<id>               job detail page
+
+    Content is generated from the job id, so it is the same for every request.
+    """
+
+    def __init__(self, options: BoardOptions, host: str = "127.0.0.1", port: int = 0):
+        self.options = options
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.server.daemon_threads = True
+        self.thread: threading.Thread | None = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[0:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def job_ids(self, page: int) -> List[str]:
+        if page < 1 or page > self.options.pages:
+            return []
+        start = (page - 1) * self.options.per_page
+        return [f"{self.options.token}-{i}" for i in range(start, start + self.options.per_page)]
+
+    def job(self, id: str) -> Dict[str, Any]:
+        rnd = random.Random(id)
+        created = datetime(2025, 1, 1) + timedelta(minutes=rnd.randint(0, 60 * 24 * 300))
+        salary = rnd.randint(50, 150) * 1000
+
+        return {
+            "vacancyId": id,
+            "title": " ".join(rnd.choice(WORDS) for _ in range(3)).title(),
+            "employerName": f"Employer {rnd.randint(1, 200)}",
+            "suburb": f"Suburb {rnd.randint(1, 500)}",
+            "state": rnd.choice(STATES),
+            "postCode": str(rnd.randint(2000, 7999)),
+            "creationDate": created.isoformat() + "Z",
+            "expiryDate": (created + timedelta(days=30)).isoformat() + "Z",
+            "salary": {"label": f"${salary:,} - ${salary + 20000:,} per year"},
+            "workType": {"label": rnd.choice(["Full time", "Part time", "Casual"])},
+            "description": self.description(rnd),
+        }
+
+    def description(self, rnd: random.Random) -> str:
+        paragraphs = [
+            "<p>" + " ".join(rnd.choice(WORDS) for _ in range(60)) + ".</p>" for _ in range(self.options.paragraphs)
+        ]
+        bullets = "".join(
+            f"<li>{' '.join(rnd.choice(WORDS) for _ in range(6))}</li>" for _ in range(8))
+        return "".join(paragraphs) + f"<ul>{bullets}</ul>"
+
+    def listing_html(self, page: int) -> str:
+        links = "".join(
+            f'<article><h3><a href="/job/{id}">{self.job(id)["title"]}</a></h3></article>' for id in self.job_ids(page))
+        return f"<html><head><title>Jobs {page}</title></head><body><main>{links}</main></body></html>"
+
+    def job_html(self, id: str) -> str:
+        job = self.job(id)
+        return (
+            "<html><head><title>Job</title></head><body>"
+            f"<h1>{job['title']}</h1>"
+            f"<div class=\"employer\">{job['employerName']}</div>"
+            f"<div class=\"location\">{job['suburb']}, {job['state']} {job['postCode']}</div>"
+            f"<div class=\"salary\">{job['salary']['label']}</div>"
+            f"<time datetime=\"{job['creationDate']}\">{job['creationDate']}</time>"
+            f"<section class=\"description\">{job['description']}</section>"
+            "</body></html>"
+        )
+
+    def handler(self):
+        board = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if board.options.latency > 0:
+                    time.sleep(board.options.latency)
+
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                page = int(query["page"][0]) if "page" in query else 1
+                parts = url.path.strip("/").split("/")
+
+                if parts == ["api", "jobs"]:
+                    ids = board.job_ids(page)
+                    self.send(200, "application/json", json.dumps({
+                        "results": [{"vacancyId": id, "title": board.job(id)["title"]} for id in ids],
+                        "total": board.options.pages * board.options.per_page
+                    }))
+                elif len(parts) == 3 and parts[0:2] == ["api", "jobs"]:
+                    self.send(200, "application/json", json.dumps(board.job(parts[2])))
+                elif parts == ["jobs"]:
+                    self.send(200, "text/html", board.listing_html(page))
+                elif len(parts) == 2 and parts[0] == "job":
+                    self.send(200, "text/html", board.job_html(parts[1]))
+                else:
+                    self.send(404, "text/plain", "Not found")
+
+            def send(self, status: int, content_type: str, body: str):
+                data = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any):
+                pass
+
+        return Handler
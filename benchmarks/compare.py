@@ -0,0 +1,55 @@
+"""
+Compares the metrics of two benchmark reports:
+
+    python -m benchmarks.compare before.json after.json
+"""
+
+import json
+import sys
+from typing import Any, Dict
+
+# metrics where a larger value is better
+HIGHER_IS_BETTER = {"records_per_sec"}
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def change(before: float | None, after: float | None) -> str:
+    if before is None or after is None:
+        return ""
+    if before == 0:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main(argv: Any):
+    if len(argv) != 2:
+        print("python -m benchmarks.compare <before.json> <after.json>")
+        sys.exit(2)
+
+    before, after = load(argv[0]), load(argv[1])
+
+    if before["config"] != after["config"] or before["spec"] != after["spec"]:
+        print("⚠️  Reports were created with a different spec or configuration")
+
+    print(f"{'metric':<28}{before['commit'] or 'before':>14}{after['commit'] or 'after':>14}{'change':>10}")
+
+    for metric, value in after["metrics"].items():
+        previous = before["metrics"].get(metric)
+        better = "" if previous is None or value is None or previous == value else (
+            "✅" if (value > previous) == (metric in HIGHER_IS_BETTER) else "❌")
+
+        print(f"{metric:<28}{show(previous):>14}{show(value):>14}{change(previous, value):>10} {better}")
+
+
+def show(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,204 @@
+"""
+End-to-end benchmark of a scraper run against the local fake board.
+
+    python -m benchmarks.run -s board_json --pages 5 --per-page 20 --latency 0.05 -w 4 -o before.json
+    python -m benchmarks.compare before.json after.json
+
+The spec (a file in benchmarks/specs or a path to any spec) is stored as the
+`Benchmark <name>` scraper and run through `ScraperQueue` and the worker pool,
+so it needs the database of the environment. The report contains records/sec,
+per-record latency percentiles, peak RSS and database round trips.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import resource
+import subprocess
+import time
+from typing import Any, Dict, List
+
+from prisma import Json
+from prisma.engine import AsyncQueryEngine
+from prisma.enums import ScrapperType
+
+import scrapers.queue as queue_module
+from api.db import connect
+from benchmarks.board import BoardOptions, FakeBoard
+from scrapers.queue import QueueProcessor, ScraperQueue
+from scrapers.queue_parts import ScraperEvents
+
+SPECS = os.path.join(os.path.dirname(__file__), "specs")
+
+
+class Counters:
+    def __init__(self):
+        # shared with the forked workers
+        self.db_round_trips = mp.Value("i", 0)
+        self.latencies: List[float] = []
+        self.worker_rss = 0
+
+
+def instrument(counters: Counters):
+    # every query of the client, including batches and raw queries, goes through the engine
+    query = AsyncQueryEngine.query
+
+    async def counted_query(self: Any, *args: Any, **kwargs: Any):
+        with counters.db_round_trips.get_lock():
+            counters.db_round_trips.value += 1
+        return await query(self, *args, **kwargs)
+
+    AsyncQueryEngine.query = counted_query  # type: ignore
+
+    # one worker task is one record
+    process_item = QueueProcessor.process_item
+
+    async def timed_process_item(self: QueueProcessor, process: int, item: Any, context: Any):
+        start = time.perf_counter()
+        result = await process_item(self, process, item, context)
+        result["elapsed"] = time.perf_counter() - start  # type: ignore
+        result["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # type: ignore
+        return result
+
+    QueueProcessor.process_item = timed_process_item  # type: ignore
+
+    process_result = QueueProcessor.process_result
+
+    def collect_result(self: QueueProcessor, result: Any):
+        if "elapsed" in result:
+            counters.latencies.append(result["elapsed"])
+            counters.worker_rss = max(counters.worker_rss, result["rss"])
+        process_result(self, result)
+
+    QueueProcessor.process_result = collect_result  # type: ignore
+
+    # benchmark runs do not send the run emails
+    queue_module.send_mail = lambda *args, **kwargs: None  # type: ignore
+
+
+def percentile(values: List[float], fraction: float) -> float | None:
+    if len(values) == 0:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def load_spec(spec: str):
+    path = spec if os.path.exists(spec) else os.path.join(SPECS, f"{spec}.yaml")
+    name = os.path.splitext(os.path.basename(path))[0]
+    with open(path, "r") as file:
+        return name, file.read()
+
+
+def commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def store_scraper(name: str, source: str) -> int:
+    prisma = await connect()
+    scraper = await prisma.scraper.find_first(where={"name": f"Benchmark {name}"})
+
+    if scraper is None:
+        scraper = await prisma.scraper.create(data={
+            "name": f"Benchmark {name}",
+            "source": source,
+            "type": ScrapperType.Job,
+            "schedule": Json([]),
+            "active": False
+        })
+    else:
+        await prisma.scraper.update(where={"id": scraper.id}, data={"source": source})
+
+    return scraper.id
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    name, source = load_spec(args.spec)
+
+    options = BoardOptions(args.pages, args.per_page, args.paragraphs, args.latency)
+    board = FakeBoard(options).start()
+
+    counters = Counters()
+    instrument(counters)
+
+    scraper_id = await store_scraper(name, source)
+
+    queue = ScraperQueue(num_workers=args.workers)
+    runs: List[int] = []
+    queue.add_listener(lambda event, data: runs.append(
+        data["id"]) if event == ScraperEvents.Started else None)
+
+    properties = {"board": board.url, "pages": str(args.pages)}
+
+    counters.db_round_trips.value = 0
+    start = time.perf_counter()
+    await queue.start_scraper(scraper_id, properties, False)
+    elapsed = time.perf_counter() - start
+    db_round_trips = counters.db_round_trips.value
+
+    queue.worker_manager.stop()
+    board.stop()
+
+    prisma = await connect()
+    run = await prisma.scraperrun.find_first(where={"id": runs[0]}) if len(runs) > 0 else None
+    records = run.succeeded if run is not None else 0
+
+    return {
+        "spec": name,
+        "commit": commit(),
+        "config": {
+            "pages": args.pages,
+            "per_page": args.per_page,
+            "paragraphs": args.paragraphs,
+            "latency": args.latency,
+            "workers": args.workers
+        },
+        "run": {
+            "id": run.id if run is not None else None,
+            "status": str(run.status) if run is not None else None,
+            "succeeded": records,
+            "failed": run.failed if run is not None else None,
+            "existing": run.existing if run is not None else None,
+        },
+        "metrics": {
+            "elapsed": elapsed,
+            "records_per_sec": records / elapsed if elapsed > 0 else 0,
+            "latency_p50": percentile(counters.latencies, 0.5),
+            "latency_p99": percentile(counters.latencies, 0.99),
+            # ru_maxrss is in kilobytes on linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "worker_peak_rss_mb": counters.worker_rss / 1024,
+            "db_round_trips": db_round_trips,
+            "db_round_trips_per_record": db_round_trips / records if records > 0 else None
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark a scraper run against the local fake board")
+    parser.add_argument("-s", "--spec", default="board_json",
+                        help="spec name in benchmarks/specs or path to a spec")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--paragraphs", type=int, default=8, help="paragraphs in each job description")
+    parser.add_argument("--latency", type=float, default=0, help="seconds added to each response")
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    parser.add_argument("-o", "--output", help="file for the JSON report")
+    args = parser.parse_args()
+
+    report = asyncio.run(benchmark(args))
+    text = json.dumps(report, indent=2)
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
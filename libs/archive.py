@@ -0,0 +1,118 @@
+import base64
+import glob
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Literal
+
+import httpx
+
+ArchiveMode = Literal["record", "replay"]
+
+
+class ArchiveMiss(Exception):
+    def __init__(self, kind: str, key: Any) -> None:
+        super().__init__(f"No recording of {kind} {key} in the archive")
+
+
+class Archive:
+    """
+    Recording of everything a run received from the outside world: HTTP responses,
+    GraphQL replies and browser pages. In `record` mode every process appends to its
+    own compressed file in the archive directory, in `replay` mode all the files are
+    loaded and the run is served from them without network or browser.
+
+    Repeated requests for the same key are replayed in the recorded order, the last
+    recording is repeated when the run asks for more.
+    """
+
+    def __init__(self, directory: str, mode: ArchiveMode):
+        self.directory = directory
+        self.mode = mode
+        self._file: Any = None
+        self._pid: int | None = None
+        self._index: Dict[str, List[Any]] | None = None
+        self._cursor: Dict[str, int] = {}
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @staticmethod
+    def key(kind: str, key: Any) -> str:
+        content = json.dumps([kind, key], sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def record(self, kind: str, key: Any, value: Any):
+        if self.mode != "record":
+            return
+
+        # each (forked) worker process writes its own file
+        if self._file is None or self._pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            self._pid = os.getpid()
+            self._file = gzip.open(os.path.join(
+                self.directory, f"{self._pid}.jsonl.gz"), "at")
+
+        self._file.write(json.dumps({
+            "kind": kind,
+            "key": self.key(kind, key),
+            "value": value
+        }, default=str) + "\n")
+        self._file.flush()
+
+    def lookup(self, kind: str, key: Any) -> Any:
+        if self._index is None:
+            self._index = self.load()
+
+        hashed = self.key(kind, key)
+        if hashed not in self._index:
+            raise ArchiveMiss(kind, key)
+
+        values = self._index[hashed]
+        cursor = self._cursor.get(hashed, 0)
+        self._cursor[hashed] = cursor + 1
+
+        return values[min(cursor, len(values) - 1)]
+
+    def load(self) -> Dict[str, List[Any]]:
+        index: Dict[str, List[Any]] = {}
+
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.jsonl.gz"))):
+            try:
+                with gzip.open(path, "rt") as file:
+                    for line in file:
+                        entry = json.loads(line)
+                        index.setdefault(entry["key"], []).append(entry["value"])
+            except (EOFError, ValueError):
+                # recording was interrupted, keep what was written
+                pass
+
+        return index
+
+    def record_response(self, method: str, url: str, body: Any, response: httpx.Response):
+        self.record("http", [method, url, body], {
+            "status": response.status_code,
+            "headers": dict(response.headers),
+            "content": base64.b64encode(response.content).decode()
+        })
+
+    def replay_response(self, method: str, url: str, body: Any) -> httpx.Response:
+        value = self.lookup("http", [method, url, body])
+
+        # content is stored decoded
+        headers = {name: header for name, header in value["headers"].items() if name.lower() not in (
+            "content-encoding", "content-length", "transfer-encoding")}
+
+        return httpx.Response(
+            value["status"],
+            headers=headers,
+            content=base64.b64decode(value["content"]),
+            request=httpx.Request(method, url)
+        )
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
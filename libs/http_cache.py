@@ -0,0 +1,166 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+# response headers kept with the cached body
+STORED_HEADERS = ["content-type", "etag", "last-modified"]
+
+
+class CacheOptions:
+    """
+    Response cache settings of a spec (`http_cache` in the properties):
+
+        http_cache:
+          ttl: 86400                  # seconds a response is used without revalidation
+          directory: ./data/http_cache
+          max_size: 512               # MB kept on disk
+
+    Actions can override the ttl with their own `cache_ttl`.
+    """
+
+    def __init__(self, config: Dict[str, Any], ttl: float | None = None):
+        self.ttl: float = ttl if ttl is not None else (
+            config["ttl"] if "ttl" in config else 0)
+        self.directory: str = config["directory"] if "directory" in config else "./data/http_cache"
+        self.max_size: int = int(
+            config["max_size"] if "max_size" in config else 512) * 1024 * 1024
+
+    @staticmethod
+    def create(shared_config: Dict[str, Any], action_config: Dict[str, Any]):
+        if "http_cache" not in shared_config and "cache_ttl" not in action_config:
+            return None
+        return CacheOptions(
+            shared_config["http_cache"] if "http_cache" in shared_config else {},
+            action_config["cache_ttl"] if "cache_ttl" in action_config else None
+        )
+
+
+class CacheEntry:
+    def __init__(self, meta: Dict[str, Any], body: bytes):
+        self.meta = meta
+        self.body = body
+
+    def fresh(self, ttl: float) -> bool:
+        return time.time() - self.meta["stored"] < ttl
+
+    def validators(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if "etag" in self.meta["headers"]:
+            headers["If-None-Match"] = self.meta["headers"]["etag"]
+        if "last-modified" in self.meta["headers"]:
+            headers["If-Modified-Since"] = self.meta["headers"]["last-modified"]
+        return headers
+
+    def response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            self.meta["status"],
+            headers=self.meta["headers"],
+            content=self.body,
+            request=request
+        )
+
+
+class HttpCache:
+    """
+    Disk cache of responses addressed by the hash of the request (method, url and
+    body). Each entry is a small metadata file and a compressed body, written
+    atomically so that worker processes can share the directory. When the directory
+    grows over its size the least recently used entries are removed.
+    """
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self.size: int | None = None
+
+    @staticmethod
+    def key(method: str, url: str, body: Any = None) -> str:
+        content = json.dumps([method, url, body], sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[0:2], key)
+
+    def get(self, key: str) -> CacheEntry | None:
+        path = self.path(key)
+        try:
+            with open(path + ".meta", "r") as file:
+                meta = json.load(file)
+            with gzip.open(path + ".body", "rb") as file:
+                body = file.read()
+            # mark as recently used
+            os.utime(path + ".body")
+        except (OSError, ValueError, EOFError):
+            return None
+        return CacheEntry(meta, body)
+
+    def put(self, key: str, response: httpx.Response):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        meta = {
+            "url": str(response.request.url),
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in STORED_HEADERS if name in response.headers},
+            "stored": time.time()
+        }
+
+        self.write(path + ".body", gzip.compress(response.content))
+        self.write(path + ".meta", json.dumps(meta).encode())
+
+        self.grow(os.path.getsize(path + ".body"))
+
+    def touch(self, key: str, entry: CacheEntry):
+        # response was revalidated, it is fresh again
+        entry.meta["stored"] = time.time()
+        self.write(self.path(key) + ".meta", json.dumps(entry.meta).encode())
+
+    def write(self, path: str, data: bytes):
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as file:
+            file.write(data)
+        os.replace(temp, path)
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        result: List[Tuple[float, int, str]] = []
+        if not os.path.exists(self.directory):
+            return result
+        for folder in os.scandir(self.directory):
+            if not folder.is_dir():
+                continue
+            for file in os.scandir(folder.path):
+                if file.name.endswith(".body"):
+                    stat = file.stat()
+                    result.append((stat.st_mtime, stat.st_size, file.path[:-5]))
+        return result
+
+    def grow(self, size: int):
+        if self.size is None:
+            self.size = sum(size for _, size, _ in self.entries())
+        else:
+            self.size += size
+
+        if self.size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_size * 0.9
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            for suffix in (".meta", ".body"):
+                try:
+                    os.remove(path + suffix)
+                except OSError:
+                    pass
+            total -= size
+
+        self.size = total
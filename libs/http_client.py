@@ -0,0 +1,211 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict
+
+import httpx
+
+from libs.archive import Archive
+from libs.http_cache import CacheOptions, HttpCache
+from libs.json_stream import JsonArrayReader
+from libs.profiler import waiting
+from libs.rate_limit import HostRateLimiter, RateLimits, WorkerRateLimiter
+
+try:
+    # faster decoder of large responses, when it is installed
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+
+class HttpClient:
+    """
+    Shared asynchronous HTTP client with keep-alive connection pooling, HTTP/2 and
+    compressed responses. The underlying pool is bound to the running event loop,
+    so a new one is created when the client is used from a different loop.
+    Requests wait for their turn in the per-host rate limiter when the caller
+    passes the rate limits of its spec, and are served from the disk cache when
+    the caller passes cache options. With an archive, responses are recorded or
+    replayed from it.
+    """
+
+    def __init__(self, headers: Dict[str, str] | None = None, timeout: float = 30, max_connections: int = 100, max_keepalive_connections: int = 20, rate_limiter: HostRateLimiter | None = None, archive: Archive | None = None):
+        self.headers = headers or {}
+        self.archive = archive
+        self.rate_limiter = rate_limiter if rate_limiter is not None else HostRateLimiter()
+        self.worker_rate_limiter = WorkerRateLimiter()
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.caches: Dict[str, HttpCache] = {}
+        self.inflight: Dict[str, asyncio.Future[httpx.Response]] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=self.limits,
+                follow_redirects=True
+            )
+            self._loop = loop
+
+        return self._client
+
+    def cache(self, options: CacheOptions) -> HttpCache:
+        if options.directory not in self.caches:
+            self.caches[options.directory] = HttpCache(
+                options.directory, options.max_size)
+        return self.caches[options.directory]
+
+    async def request(self, method: str, url: str, headers: Dict[str, str] | None = None, json: Any = None, timeout: float | None = None, rate_limits: RateLimits | None = None, cache: CacheOptions | None = None) -> httpx.Response:
+        if self.archive is not None and self.archive.replaying:
+            return self.archive.replay_response(method, url, json)
+
+        if cache is None:
+            response = await self.send(method, url, headers, json, timeout, rate_limits)
+        else:
+            response = await self.send_shared(method, url, headers, json, timeout, rate_limits, cache)
+
+        if self.archive is not None:
+            self.archive.record_response(method, url, json, response)
+
+        return response
+
+    async def send_shared(self, method: str, url: str, headers: Dict[str, str] | None, json: Any, timeout: float | None, rate_limits: RateLimits | None, cache: CacheOptions) -> httpx.Response:
+        key = HttpCache.key(method, url, json)
+
+        # identical requests in flight share one response
+        if key in self.inflight:
+            return await asyncio.shield(self.inflight[key])
+
+        future: asyncio.Future[httpx.Response] = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            response = await self.send_cached(key, cache, method, url, headers, json, timeout, rate_limits)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            # nobody may be waiting for this request
+            future.exception()
+            raise
+        finally:
+            del self.inflight[key]
+
+    async def send_cached(self, key: str, options: CacheOptions, method: str, url: str, headers: Dict[str, str] | None, json: Any, timeout: float | None, rate_limits: RateLimits | None) -> httpx.Response:
+        cache = self.cache(options)
+        entry = cache.get(key)
+
+        if entry is not None and entry.fresh(options.ttl):
+            return entry.response(httpx.Request(method, url))
+
+        # revalidate the stale response with its validators
+        if entry is not None:
+            headers = {**(headers or {}), **entry.validators()}
+
+        response = await self.send(method, url, headers, json, timeout, rate_limits)
+
+        if response.status_code == 304 and entry is not None:
+            cache.touch(key, entry)
+            return entry.response(response.request)
+
+        if response.status_code == 200:
+            cache.put(key, response)
+
+        return response
+
+    async def throttle(self, url: str, rate_limits: RateLimits | None):
+        if rate_limits is not None:
+            host = rate_limits.host(url)
+            interval = rate_limits.interval(host)
+            worker_interval = rate_limits.worker_interval(host)
+            if interval is not None:
+                with waiting("rate_limit"):
+                    await self.rate_limiter.acquire(host, interval)
+            elif worker_interval is not None:
+                with waiting("rate_limit"):
+                    await self.worker_rate_limiter.acquire(host, worker_interval)
+
+    async def send(self, method: str, url: str, headers: Dict[str, str] | None, json: Any, timeout: float | None, rate_limits: RateLimits | None) -> httpx.Response:
+        await self.throttle(url, rate_limits)
+
+        with waiting("http", url):
+            return await self.client.request(
+                method,
+                url,
+                headers=headers,
+                json=json,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+            )
+
+    async def fetch_text(self, url: str, timeout: float | None = None, rate_limits: RateLimits | None = None, cache: CacheOptions | None = None) -> str:
+        response = await self.request("GET", url, timeout=timeout, rate_limits=rate_limits, cache=cache)
+        return response.text
+
+    async def fetch_json(self, url: str, timeout: float | None = None, rate_limits: RateLimits | None = None, cache: CacheOptions | None = None) -> Any:
+        response = await self.request("GET", url, timeout=timeout, rate_limits=rate_limits, cache=cache)
+        return loads(response.content)
+
+    async def post_json(self, url: str, body: Any, headers: Dict[str, str] | None = None, timeout: float | None = None, rate_limits: RateLimits | None = None, cache: CacheOptions | None = None) -> Any:
+        response = await self.request("POST", url, headers=headers, json=body, timeout=timeout, rate_limits=rate_limits, cache=cache)
+        return loads(response.content)
+
+    async def fetch_graphql(self, url: str, query: str, variables: Any, timeout: float | None = None, rate_limits: RateLimits | None = None, cache: CacheOptions | None = None) -> Any:
+        payload = {
+            'query': query,
+            'variables': variables
+        }
+        return await self.post_json(url, payload, {'Content-Type': 'application/json'}, timeout, rate_limits, cache)
+
+    async def stream_json(self, url: str, path: str, timeout: float | None = None, rate_limits: RateLimits | None = None) -> AsyncIterator[Any]:
+        """
+        Elements of the array at `path` of a JSON response, decoded while the body is
+        downloaded. Streamed responses skip the disk cache, an archive keeps them whole.
+        """
+        reader = JsonArrayReader(path)
+
+        if self.archive is not None:
+            response = await self.request("GET", url, timeout=timeout, rate_limits=rate_limits)
+            for element in reader.feed(response.content):
+                yield element
+            for element in reader.finish():
+                yield element
+            return
+
+        await self.throttle(url, rate_limits)
+
+        request = self.client.build_request(
+            "GET", url, timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT)
+        with waiting("http", url):
+            response = await self.client.send(request, stream=True)
+
+        try:
+            response.raise_for_status()
+            chunks = response.aiter_bytes()
+            while True:
+                # children of the elements run between the reads
+                with waiting("http"):
+                    chunk = await anext(chunks, None)
+                if chunk is None:
+                    break
+                for element in reader.feed(chunk):
+                    yield element
+            for element in reader.finish():
+                yield element
+        finally:
+            await response.aclose()
+
+    async def aclose(self):
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
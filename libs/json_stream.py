@@ -0,0 +1,161 @@
+import codecs
+import json
+import re
+from typing import Any, List
+
+# characters that open, close or separate values
+structural = re.compile(r'["{}\[\],:]')
+# rest of a string after its opening quote
+string_end = re.compile(r'(?:[^"\\]|\\.)*"', re.S)
+separator = re.compile(r'[\s,]*')
+blank = re.compile(r'\s*')
+decoder = json.JSONDecoder()
+
+
+class JsonStreamError(Exception):
+    pass
+
+
+class JsonArrayReader:
+    """
+    Incremental reader of the elements of one array of a JSON document, e.g. `results`
+    or `data.jobs` (an empty path is an array at the root). Chunks of the document are
+    fed as they arrive and every element is decoded as soon as it is complete, so only
+    the element being read is kept in memory. The rest of the document is skipped
+    without decoding it.
+    """
+
+    def __init__(self, path: str):
+        self.path = [part for part in path.split(".") if part != ""]
+        self.text = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        # chunks that arrived since the last attempt, and the size to wait for
+        self.chunks: List[str] = []
+        self.size = 0
+        self.needed = 0
+
+        # open containers of the document and the key that leads to each of them
+        self.kinds: List[str] = []
+        self.keys: List[str | None] = []
+        self.key: str | None = None
+        self.expect_key = False
+
+        self.inside = False
+        self.done = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        if self.done:
+            return []
+
+        text = self.text.decode(chunk)
+        self.chunks.append(text)
+        self.size += len(text)
+
+        # a large element is decoded again only when its data has doubled
+        if self.size < self.needed:
+            return []
+
+        self.buffer += "".join(self.chunks)
+        self.chunks = []
+        self.size = len(self.buffer)
+        elements: List[Any] = []
+
+        while not self.done:
+            if self.inside:
+                if not self.read_element(elements):
+                    break
+            elif not self.find_array():
+                break
+
+        # drop what was read, the element in progress starts at the position
+        if self.pos > 0:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        self.size = len(self.buffer)
+        self.needed = 2 * self.size
+
+        return elements
+
+    def finish(self) -> List[Any]:
+        # elements still waiting in the chunks, the document has to be complete
+        self.needed = 0
+        elements = self.feed(b"") if len(self.chunks) > 0 else []
+
+        if not self.done:
+            if self.inside:
+                try:
+                    decoder.raw_decode(self.buffer, separator.match(self.buffer).end())  # type: ignore
+                    error = "the array is not closed"
+                except json.JSONDecodeError as e:
+                    error = e.msg
+                raise JsonStreamError(f"Response ended inside the array {'.'.join(self.path)}: {error}")
+            raise JsonStreamError(f"Could not find the array {'.'.join(self.path)} in the response")
+
+        return elements
+
+    def find_array(self) -> bool:
+        # walks the document up to the array, returns False when more data is needed
+        buffer = self.buffer
+        while True:
+            match = structural.search(buffer, self.pos)
+            if match is None:
+                # scalars between the structural characters are skipped
+                self.pos = len(buffer)
+                return False
+
+            char = buffer[match.start()]
+            self.pos = match.start() + 1
+
+            if char == '"':
+                end = string_end.match(buffer, self.pos)
+                if end is None:
+                    self.pos -= 1
+                    return False
+                if self.expect_key:
+                    self.key = json.loads(buffer[self.pos - 1:end.end()])
+                self.pos = end.end()
+            elif char == ":":
+                self.expect_key = False
+            elif char == ",":
+                self.expect_key = len(self.kinds) > 0 and self.kinds[-1] == "{"
+            elif char == "{" or char == "[":
+                in_object = len(self.kinds) > 0 and self.kinds[-1] == "{"
+                self.keys.append(self.key if in_object else None)
+                self.kinds.append(char)
+                self.key = None
+                self.expect_key = char == "{"
+
+                if char == "[" and self.keys[1:] == self.path and (len(self.path) > 0 or len(self.kinds) == 1):
+                    self.inside = True
+                    return True
+            else:
+                self.kinds.pop()
+                self.keys.pop()
+                self.expect_key = False
+
+    def read_element(self, elements: List[Any]) -> bool:
+        # decodes the next element of the array, returns False when more data is needed
+        buffer = self.buffer
+
+        self.pos = separator.match(buffer, self.pos).end()  # type: ignore
+        if self.pos == len(buffer):
+            return False
+        if buffer[self.pos] == "]":
+            self.done = True
+            return True
+
+        try:
+            element, end = decoder.raw_decode(buffer, self.pos)
+        except json.JSONDecodeError:
+            # the element is not complete yet
+            return False
+
+        # a number at the end of the buffer may go on in the next chunk
+        after = blank.match(buffer, end).end()  # type: ignore
+        if after == len(buffer) or buffer[after] not in ",]":
+            return False
+
+        elements.append(element)
+        self.pos = end
+        return True
@@ -0,0 +1,134 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Mapping
+
+from libs.tracing import Tracer
+
+# frame of the action running in the current task, copied into the tasks it starts
+current_frame: ContextVar["Frame | None"] = ContextVar("current_frame", default=None)
+
+COUNTERS = ("calls", "total", "self", "io", "errors")
+
+
+class Frame:
+    __slots__ = ("profiler", "name", "parent", "start", "children", "io", "failed_child")
+
+    def __init__(self, profiler: "Profiler", name: str, parent: "Frame | None"):
+        self.profiler = profiler
+        self.name = name
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.children = 0.0
+        self.io = 0.0
+        self.failed_child = False
+
+
+class Measure:
+    def __init__(self, profiler: "Profiler", name: str, item: Mapping[str, Any] | None = None):
+        self.profiler = profiler
+        self.name = name
+        self.item = item
+
+    def __enter__(self):
+        parent = current_frame.get()
+        self.frame = Frame(self.profiler, self.name, parent)
+        self.token = current_frame.set(self.frame)
+
+    def __exit__(self, error_type: Any, error: Any, traceback: Any):
+        frame = self.frame
+        current_frame.reset(self.token)
+
+        elapsed = time.perf_counter() - frame.start
+        stats = self.profiler.action(frame.name)
+        stats["calls"] += 1
+        stats["total"] += elapsed
+        # children running concurrently can take longer than their parent
+        stats["self"] += max(0.0, elapsed - frame.children)
+        stats["io"] += frame.io
+
+        # an error is counted only by the action where it was raised, not by the parents it passes
+        if error_type is not None and not frame.failed_child:
+            stats["errors"] += 1
+
+        if self.profiler.tracer is not None:
+            self.profiler.tracer.span(frame.name, "action", elapsed, {
+                "record": self.item["jobId"] if self.item is not None and "jobId" in self.item else None,
+                "error": error_type.__name__ if error_type is not None else None
+            })
+
+        if frame.parent is not None:
+            frame.parent.children += elapsed
+            if error_type is not None:
+                frame.parent.failed_child = True
+
+
+class Waiting:
+    def __init__(self, kind: str, detail: Any = None):
+        self.kind = kind
+        self.detail = detail
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, error_type: Any, error: Any, traceback: Any):
+        frame = current_frame.get()
+        if frame is None:
+            return
+
+        elapsed = time.perf_counter() - self.start
+        frame.io += elapsed
+
+        io = frame.profiler.io
+        io[self.kind] = io[self.kind] + elapsed if self.kind in io else elapsed
+
+        if frame.profiler.tracer is not None:
+            frame.profiler.tracer.span(self.kind, "io", elapsed, {"detail": self.detail} if self.detail is not None else None)
+
+
+def waiting(kind: str, detail: Any = None):
+    """
+    Marks time spent waiting for the outside world (`http`, `rate_limit`, `browser`, `db`, `gemini`)
+    or for the workers (`schedule`, `workers`),
+    it is added to the I/O time of the running action and to the totals of its kind.
+    """
+    return Waiting(kind, detail)
+
+
+class Profiler:
+    """
+    Per-action counters of a run: calls, total and self wall time (without the
+    children), I/O wait and errors, keyed by the action name. Worker processes send
+    their counters with the results and they are merged into the run.
+    """
+
+    def __init__(self, tracer: Tracer | None = None):
+        self.actions: Dict[str, Dict[str, float]] = {}
+        self.io: Dict[str, float] = {}
+        # timeline of the run, when tracing is enabled
+        self.tracer = tracer
+
+    def action(self, name: str) -> Dict[str, float]:
+        if name not in self.actions:
+            self.actions[name] = {counter: 0 for counter in COUNTERS}
+        return self.actions[name]
+
+    def measure(self, name: str, item: Mapping[str, Any] | None = None):
+        return Measure(self, name, item)
+
+    def merge(self, profile: Dict[str, Any]):
+        for name, counters in profile["actions"].items():
+            stats = self.action(name)
+            for counter in COUNTERS:
+                stats[counter] += counters[counter]
+
+        for kind, elapsed in profile["io"].items():
+            self.io[kind] = self.io[kind] + elapsed if kind in self.io else elapsed
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "actions": {
+                name: {counter: round(value, 6) for counter, value in stats.items()}
+                for name, stats in sorted(self.actions.items(), key=lambda x: -x[1]["self"])
+            },
+            "io": {kind: round(elapsed, 6) for kind, elapsed in self.io.items()}
+        }
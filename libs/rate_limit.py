@@ -0,0 +1,100 @@
+import asyncio
+import multiprocessing as mp
+import time
+import zlib
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+
+class HostRateLimiter:
+    """
+    Per-host request budget shared by all worker processes. Every host hashes to a
+    slot in shared memory holding the time its next request is due. A request
+    reserves the following turn under a process lock and then sleeps until its turn,
+    so the lock is held only for the reservation.
+    """
+
+    def __init__(self, slots: int = 256):
+        self.lock = mp.Lock()
+        self.next_time = mp.RawArray("d", slots)
+
+    def reserve(self, host: str, interval: float) -> float:
+        # crc32 is stable between processes, unlike hash()
+        index = zlib.crc32(host.encode()) % len(self.next_time)
+
+        with self.lock:
+            now = time.time()
+            start = max(now, self.next_time[index])
+            self.next_time[index] = start + interval
+
+        return start - now
+
+    async def acquire(self, host: str, interval: float):
+        if interval <= 0:
+            return
+
+        delay = self.reserve(host, interval)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class WorkerRateLimiter:
+    """
+    Per-host request budget of one worker process, for the hosts without a rate in
+    the spec. Workers do not wait for each other, like the sleeps it replaces.
+    """
+
+    def __init__(self):
+        self.next_time: Dict[str, float] = {}
+
+    async def acquire(self, host: str, interval: float):
+        if interval <= 0:
+            return
+
+        now = time.time()
+        start = max(now, self.next_time[host] if host in self.next_time else 0)
+        self.next_time[host] = start + interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class RateLimits:
+    """
+    Requests per second allowed for each host, configured in the spec properties:
+
+        rate_limits:
+          www.workforceaustralia.gov.au: 2
+          default: 1
+
+    The `default` entry applies to all hosts that are not listed. Without it, the
+    hosts that are not listed get the `worker_default` rate in each worker.
+    """
+
+    def __init__(self, config: Dict[str, Any] | None, worker_default: float | None = None):
+        config = config or {}
+
+        self.default = self.to_interval(config["default"]) if "default" in config else None
+        self.worker_default = self.to_interval(worker_default) if worker_default is not None and self.default is None else None
+        self.hosts: Dict[str, float] = {
+            host: self.to_interval(rate) for host, rate in config.items() if host != "default"
+        }
+
+    @staticmethod
+    def to_interval(rate: float) -> float:
+        return 1 / float(rate) if rate else 0
+
+    @staticmethod
+    def host(url: str) -> str:
+        return urlsplit(url).hostname or ""
+
+    def interval(self, host: str) -> float | None:
+        # shared by all the workers
+        if host in self.hosts:
+            return self.hosts[host]
+        return self.default
+
+    def worker_interval(self, host: str) -> float | None:
+        # for each worker, when the spec sets no rate for the host
+        if host in self.hosts:
+            return None
+        return self.worker_default
@@ -0,0 +1,56 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+
+class Tracer:
+    """
+    Timeline of a run in the trace event format of Chrome (chrome://tracing, Perfetto).
+    Every process of the run keeps its own events, workers send them with their
+    results and the manager writes them all to one file. Each asyncio task has its
+    own track, so that concurrent actions do not overlap.
+    """
+
+    def __init__(self, process_name: str, tags: Dict[str, Any]):
+        self.pid = os.getpid()
+        self.tags = tags
+        self.tracks: Dict[int, int] = {}
+        self.events: List[Dict[str, Any]] = [{
+            "name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+            "args": {"name": process_name}
+        }]
+
+    def track(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = id(task) if task is not None else 0
+
+        if key not in self.tracks:
+            self.tracks[key] = len(self.tracks)
+            self.events.append({
+                "name": "thread_name", "ph": "M", "pid": self.pid, "tid": self.tracks[key],
+                "args": {"name": task.get_name() if task is not None else "main"}
+            })
+        return self.tracks[key]
+
+    def span(self, name: str, category: str, elapsed: float, args: Dict[str, Any] | None = None):
+        # span ends now, wall clock time keeps the processes on the same timeline
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (time.time() - elapsed) * 1e6,
+            "dur": elapsed * 1e6,
+            "pid": self.pid,
+            "tid": self.track(),
+            "args": {**self.tags, **args} if args else self.tags
+        })
+
+    def write(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file, default=str)
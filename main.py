@@ -189,6 +189,13 @@ async def running_report(runId: int):
     return item.model.create_report()
 
 
+@app.get("/scraper/{runId}/profile")
+async def running_profile(runId: int):
+    item = next(
+        x for x in manager_context.queue.items if x.run is not None and x.run.id == runId)
+    return item.model.create_profile()
+
+
 @app.get("/scraper/{runId}/log")
 async def running_log(runId: int) -> str:
     item = next(
@@ -4,6 +4,7 @@ import json
 import sys
 from typing import Any, Dict, List
 
+from libs.archive import Archive
 from scrapers.queue import ScraperQueue
 
 DEFAULT_START = "{}"
@@ -17,20 +18,23 @@ async def do_the_job(properties: Dict[str, Any], queue: ScraperQueue, scrapers:
 def main(argv: Any):
     properties = DEFAULT_START
     scrapers = []
+    archive = None
 
-    queue = ScraperQueue(num_workers=1)
-  
     try:
         opts, _ = getopt.getopt(
-            argv, "hp:s:", ["pages=", "scrapers="])
+            argv, "hp:s:", ["pages=", "scrapers=", "record=", "replay="])
     except getopt.GetoptError:
-        print("python pipelines -p <properties> -s <scraper_ids>")
+        print("python pipelines -p <properties> -s <scraper_ids> [--record <dir> | --replay <dir>]")
         sys.exit(2)
     for opt, arg in opts:
         if opt == "-h":
             print(
-                "python pipelines -p <properties> -s <scraper_ids>")
+                "python pipelines -p <properties> -s <scraper_ids> [--record <dir> | --replay <dir>]")
             sys.exit()
+        elif opt == "--record":
+            archive = Archive(arg, "record")
+        elif opt == "--replay":
+            archive = Archive(arg, "replay")
         elif opt in ("-p", "--properties"):
             properties = arg
         elif opt in ("-s", "--scrapers"):
@@ -40,6 +44,8 @@ def main(argv: Any):
 
             scrapers = [int(x) for x in scraper_ids]
 
+    queue = ScraperQueue(num_workers=1, archive=archive)
+
     asyncio.run(do_the_job(json.loads(properties), queue, scrapers))
     queue.worker_manager.stop()
 
@@ -1,28 +1,40 @@
 import datetime
 import json
 import re
-import unicodedata
+from collections import ChainMap
+from functools import lru_cache
+from itertools import islice
 from os import mkdir
 from os.path import exists
-from typing import Any, Dict, Literal, cast
+from typing import Any, Callable, Dict, Iterable, List, Literal, Tuple, cast
+from urllib.parse import urlsplit
 
 import dateutil.parser
 import pytz
 import requests
-from bs4 import BeautifulSoup, Tag
+import soupsieve
+from bs4 import BeautifulSoup, ElementFilter, Tag
 from typing_extensions import NotRequired, TypedDict
 
+from scrapers.markup import markdown_text, tidy_string, to_text
 from scrapers.omega.exception import OmegaException
-from html_to_markdown import convert_to_markdown
+
+
+# pooled connections for the blocking helpers
+session = requests.Session()
+
+
+# characters that the parser changes: markup, entities and control characters
+markup_pattern = re.compile(
+    r"[<&\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\ufeff\ufffe\uffff\ud800-\udfff]")
 
 
 def perfect_string(text: str):
     text = re.sub(r'(?<!\.)</li>', '.', text)
-    text = BeautifulSoup(text, "lxml").text
-    text = unicodedata.normalize("NFKD", text)
-    text = text.replace(".", ". ")
-    text = text.strip()
-    return text
+    # plain text would come out of the parser unchanged
+    if markup_pattern.search(text) is not None:
+        text = BeautifulSoup(text, "lxml").text
+    return tidy_string(text)
 
 
 def current_date():
@@ -44,7 +56,7 @@ def fetch_graphql(url: str, query: str, variables: Any):
         'variables': variables
     }
 
-    response = requests.post(url, headers=headers, json=payload)
+    response = session.post(url, headers=headers, json=payload)
 
     # storing the JSON response
     # from url in data
@@ -55,7 +67,7 @@ def fetch_graphql(url: str, query: str, variables: Any):
 
 def fetch_json(url: str):
     # store the response of URL
-    response = requests.get(url)
+    response = session.get(url)
 
     # storing the JSON response
     # from url in data
@@ -66,7 +78,7 @@ def fetch_json(url: str):
 
 def post_json(url: str, body: Any):
     # store the response of URL
-    response = requests.post(url, json=body)
+    response = session.post(url, json=body)
 
     # storing the JSON response
     # from url in data
@@ -141,174 +153,362 @@ class ExtractorConfig(TypedDict):
     optional: NotRequired[bool | OptionalOptions]
     convert: str | Dict[str, Any]
     validate: NotRequired[Dict[str, Any]]
+    lazy: NotRequired[bool]
 
 
-def find_parent(path: str, root: Any) -> Any:
-    # split the path
-    # for each part of the path
-    #   if it is a list
-    #       return that element
-    #   else
-    #       if the item has a key
-    #           if the key matches the path
-    #               return the item
-    optional = path.startswith("?")
-    if optional:
-        path = path[1:]
+def preview(value: Any, limit: int = 120) -> str:
+    """
+    Short description of a value for error messages, large payloads are not formatted.
+    """
+    if isinstance(value, (dict, ChainMap)):
+        keys = list(islice(value.keys(), 10))
+        return f"object with keys {keys}" + (" ..." if len(value) > len(keys) else "")
+    if isinstance(value, list):
+        return f"list of {len(value)}"
+    text = str(value)
+    return text if len(text) <= limit else text[:limit] + " ..."
 
-    parts = path.split(".")
-    parent = root
-    for part in parts:
-        if isinstance(parent, list):
-            parent = parent[int(part)]
-        else:
-            if isinstance(parent, dict):
+
+# kinds of the steps of a path
+KEY, WILDCARD, SLICE = 0, 1, 2
+
+slice_pattern = re.compile(r"^(-?\d*):(-?\d*)$")
+
+# element of a wildcard that an optional path does not find, unlike a null value
+MISSING = object()
+
+
+class PathAccessor:
+    """
+    Dotted path (e.g. `job.result.vacancyId`, `?salary.label`, `items.*.name` or
+    `items[0:3].id`) split once and resolved against a dictionary or list without
+    re-parsing the path. A wildcard or a slice resolves the rest of the path for
+    each element and returns a list, null values are kept and the elements that an
+    optional path does not find are skipped. An optional path that misses a part
+    before its wildcard gives an empty list.
+    """
+    __slots__ = ("path", "optional", "parts", "steps", "many")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.optional = path.startswith("?")
+
+        # `items[0]` is the same as `items.0`
+        dotted = (path[1:] if self.optional else path).replace("[", ".").replace("]", "")
+        self.parts = tuple(dotted.split("."))
+
+        steps: List[Tuple[int, Any, int | None]] = []
+        for part in self.parts:
+            match = slice_pattern.match(part)
+            if part == "*":
+                steps.append((WILDCARD, part, None))
+            elif match is not None:
+                steps.append((SLICE, slice(
+                    int(match.group(1)) if match.group(1) else None,
+                    int(match.group(2)) if match.group(2) else None), None))
+            else:
+                # the position, when the part is used on a list
+                index = int(part) if part.lstrip("-").isdigit() else None
+                steps.append((KEY, part, index))
+
+        self.steps = tuple(steps)
+        self.many = any(kind != KEY for kind, _, _ in steps)
+
+    def resolve(self, root: Any) -> Any:
+        if self.many:
+            result = self.walk(root, 0)
+            # an optional path that misses a part before its wildcard finds no elements, as for a null parent
+            return [] if result is MISSING else result
+
+        # for each part of the path
+        #   if it is a list
+        #       return that element
+        #   else
+        #       if the item has a key
+        #           if the key matches the path
+        #               return the item
+        parent = root
+        for _, part, index in self.steps:
+            if isinstance(parent, list):
+                parent = self.at(parent, part, index)
+            elif isinstance(parent, (dict, ChainMap)):
                 if part in parent:
                     parent = parent[part]
-                elif optional:
+                elif self.optional:
                     return None
                 else:
-                    raise OmegaException(
-                        "error", f"Could not find {part} in {parent}")
+                    raise self.missing(part, parent)
             elif parent is None:
-                if optional:
+                if self.optional:
                     return None
+                raise self.missing(part, parent)
+            else:
+                raise OmegaException(
+                    "error", f"Expected dictionary {part} of {self.path} in {preview(parent)}")
+        return parent
+
+    def walk(self, parent: Any, position: int) -> Any:
+        for i in range(position, len(self.steps)):
+            kind, part, index = self.steps[i]
+
+            if kind == KEY:
+                if isinstance(parent, list):
+                    parent = self.at(parent, part, index, MISSING)
+                    if parent is MISSING:
+                        return MISSING
+                elif isinstance(parent, (dict, ChainMap)) and part in parent:
+                    parent = parent[part]
+                elif self.optional and (parent is None or isinstance(parent, (dict, ChainMap))):
+                    return MISSING
+                elif parent is None or isinstance(parent, (dict, ChainMap)):
+                    raise self.missing(part, parent)
                 else:
                     raise OmegaException(
-                        "error", f"Could not find {part} in {parent}")
+                        "error", f"Expected dictionary {part} of {self.path} in {preview(parent)}")
+                continue
+
+            if isinstance(parent, list):
+                elements = parent if kind == WILDCARD else parent[part]
+            elif kind == WILDCARD and isinstance(parent, (dict, ChainMap)):
+                elements = list(parent.values())
+            elif parent is None and self.optional:
+                return []
             else:
                 raise OmegaException(
-                    "error", f"Expected dictionary {part} in {parent}")
-    return parent
+                    "error", f"Expected list {part} of {self.path} in {preview(parent)}")
 
+            if i + 1 == len(self.steps):
+                return list(elements)
 
-def extract_text(original_text: Any | None, extractor: ExtractorConfig, item: Dict[str, Any]):
-    value = __process_text(original_text, extractor)
+            result: List[Any] = []
+            for element in elements:
+                value = self.walk(element, i + 1)
+                if value is not MISSING:
+                    result.append(value)
+            return result
+        return parent
 
-    if value is None:
-        # by default everything is optional and returns none in that case
-        if "optional" in extractor:
-            fallback_options = extractor["optional"]
-            if fallback_options == False:
-                raise OmegaException(
-                    'error',
-                    f"Extraction failed in '{original_text}' for {str(extractor)}")
-            else:
-                if fallback_options == True:
-                    return None
-                elif "fallback" in fallback_options:
-                    return find_parent(fallback_options["fallback"], item)
-                elif "value" in fallback_options:
-                    return fallback_options["value"]
-                else:
-                    raise OmegaException(
-                        'fatal',
-                        f"No fallback options provided for {str(extractor)}")
+    def at(self, parent: List[Any], part: str, index: int | None, default: Any = None) -> Any:
+        if index is None:
+            raise OmegaException(
+                "error", f"Expected index {part} of {self.path} in {preview(parent)}")
+        if -len(parent) <= index < len(parent):
+            return parent[index]
+        if self.optional:
+            return default
+        raise OmegaException(
+            "error", f"Could not find {part} of {self.path} in {preview(parent)}")
 
-    return value
+    def missing(self, part: str, parent: Any) -> OmegaException:
+        return OmegaException("error", f"Could not find {part} of {self.path} in {preview(parent)}")
 
 
-def __process_text(text: Any | None, extractor: ExtractorConfig) -> Any:
+@lru_cache(maxsize=4096)
+def compile_path(path: str) -> PathAccessor:
+    return PathAccessor(path)
 
-    if text is None:
-        return None
 
-    # process regex
-    if "regex" in extractor:
-        regex_options = extractor["regex"]
+def find_parent(path: str, root: Any) -> Any:
+    return compile_path(path).resolve(root)
 
-        # we can first check if the regex matches
-        if "match" in regex_options:
-            reg = re.compile(regex_options["match"])
-            if reg.search(text) is None:
-                return None
 
-        reg = re.compile(regex_options["search"])
+template_pattern = re.compile(r"\$\{(.*?)\}")
 
-        # we can search for multiple items
-        if "index" in regex_options and regex_options["index"] != 0:
-            results = [x for x in reg.finditer(text)]
 
-            if regex_options["index"] < len(results):
-                result = results[regex_options["index"]]
-            else:
-                return None
-        else:
-            result = reg.search(text)
+class Template:
+    """
+    String with `${path}` placeholders compiled into literal segments and path
+    accessors, so that rendering is a single join.
+    """
+    __slots__ = ("source", "head", "segments")
+
+    def __init__(self, source: str):
+        parts = template_pattern.split(source)
+
+        self.source = source
+        self.head: str = parts[0]
+        self.segments: Tuple[Tuple[PathAccessor, str], ...] = tuple(
+            (compile_path(parts[i]), parts[i + 1]) for i in range(1, len(parts), 2)
+        )
+
+    @property
+    def static(self) -> bool:
+        return len(self.segments) == 0
 
-        # get the group number
-        group_number = int(
-            regex_options["group"]) if "group" in regex_options else 1
+    def render(self, root: Any) -> str:
+        if not self.segments:
+            return self.source
+
+        result = [self.head]
+        for accessor, literal in self.segments:
+            result.append(str(accessor.resolve(root)))
+            result.append(literal)
+        return "".join(result)
+
+
+@lru_cache(maxsize=4096)
+def compile_template(source: str) -> Template:
+    return Template(source)
+
+
+class Extractor:
+    """
+    Pipeline of an `ExtractorConfig` compiled once, when the action is initialised:
+    the regular expressions are compiled and the steps of the config are resolved,
+    so that a record only runs the steps that the field uses.
+    """
 
-        # in case we did not find the match
-        if result is None or (len(result.groups())) < group_number:
+    def __init__(self, config: ExtractorConfig):
+        self.config = config
+
+        # raw value of an element
+        self.attribute: str | None = config["attribute"] if "attribute" in config else None
+        self.type: str | None = config["type"] if "type" in config else None
+
+        self.match: re.Pattern[str] | None = None
+        self.search: re.Pattern[str] | None = None
+        self.index = 0
+        self.group = 1
+        if "regex" in config:
+            regex_options = config["regex"]
+            if "match" in regex_options:
+                self.match = re.compile(regex_options["match"])
+            self.search = re.compile(regex_options["search"])
+            self.index = regex_options["index"] if "index" in regex_options else 0
+            self.group = int(regex_options["group"]) if "group" in regex_options else 1
+
+        self.convert: str | Dict[str, Any] | None = config["convert"] if "convert" in config else None
+        self.split: Dict[str, Any] | None = config["split"] if "split" in config else None  # type: ignore
+        self.split_with: str = self.split["with"] if self.split is not None and "with" in self.split else " "
+        self.string_join: str | None = config["string_join"] if "string_join" in config else None  # type: ignore
+        self.validate: List[str] | None = list(config["validate"].keys()) if "validate" in config else None
+
+        self.optional: bool | OptionalOptions | None = config["optional"] if "optional" in config else None
+
+    def raw(self, souped: "Souped") -> Any:
+        if self.attribute is not None:
+            return souped.attrs[self.attribute]
+        elif self.type == "text":
+            return souped.text
+        elif self.type == "markdown":
+            return markdown_text(souped.element)
+        elif self.type == "normalised_text":
+            first = souped.element.contents[0]
+            text = to_text(first)
+            return tidy_string(text) if text is not None else perfect_string(str(first))
+        raise Exception("Invalid extractor type")
+
+    def extract(self, original_text: Any | None, item: Dict[str, Any]):
+        value = self.process(original_text)
+
+        if value is None:
+            # by default everything is optional and returns none in that case
+            if self.optional is not None:
+                fallback_options = self.optional
+                if fallback_options == False:
+                    raise OmegaException(
+                        'error',
+                        f"Extraction failed in '{preview(original_text)}' for {str(self.config)}")
+                else:
+                    if fallback_options == True:
+                        return None
+                    elif "fallback" in fallback_options:  # type: ignore
+                        return find_parent(fallback_options["fallback"], item)  # type: ignore
+                    elif "value" in fallback_options:  # type: ignore
+                        return fallback_options["value"]  # type: ignore
+                    else:
+                        raise OmegaException(
+                            'fatal',
+                            f"No fallback options provided for {str(self.config)}")
+
+        return value
+
+    def process(self, text: Any | None) -> Any:
+        if text is None:
             return None
-        else:
-            text = result.group(group_number)
 
-    if text is None:
-        return None
+        # process regex
+        if self.search is not None:
+            # we can first check if the regex matches
+            if self.match is not None and self.match.search(text) is None:
+                return None
 
-    # process translation
-    # if "translate" in extractor:
-    #     text = Translator.instance().translate(text, {
-    #         "source_language": extractor["translate"]
-    #     })
+            # we can search for multiple items
+            if self.index != 0:
+                results = [x for x in self.search.finditer(text)]
 
-    # process function conversion
-    if "convert" in extractor:
-        if isinstance(extractor["convert"], dict):
-            converter = extractor["convert"]
+                if self.index < len(results):
+                    result = results[self.index]
+                else:
+                    return None
+            else:
+                result = self.search.search(text)
 
-            if converter["type"] == "string_to_json":
-                try:
-                    text = json.loads(text)
-                except:
-                    if "default" in converter:
-                        if converter["default"] == "None":
-                            return None
-                        return converter["default"]
+            # in case we did not find the match
+            if result is None or (len(result.groups())) < self.group:
+                return None
             else:
-                raise Exception("Invalid converter")
+                text = result.group(self.group)
 
-        else:
-            try:
-                if extractor["convert"] == "html_to_text":
-                    soup = BeautifulSoup(text, "html.parser")
-                    text = soup.get_text()
-                elif extractor["convert"] == "relative_date_to_date":
-                    return parse_relative_date(text)
-                elif extractor["convert"] == "iso_string_to_date":
-                    return dateutil.parser.isoparse(text)
-                elif extractor["convert"] == "int":
-                    return int(text.replace(',', ''))
+            if text is None:
+                return None
+
+        # process function conversion
+        if self.convert is not None:
+            if isinstance(self.convert, dict):
+                converter = self.convert
+
+                if converter["type"] == "string_to_json":
+                    try:
+                        text = json.loads(text)
+                    except:
+                        if "default" in converter:
+                            if converter["default"] == "None":
+                                return None
+                            return converter["default"]
                 else:
                     raise Exception("Invalid converter")
-            except:
-                raise OmegaException(
-                    "error", f"Could not convert {text} to {extractor['convert']}")
 
-    if text is None:
-        return None
+            else:
+                try:
+                    if self.convert == "html_to_text":
+                        soup = BeautifulSoup(text, "html.parser")
+                        text = soup.get_text()
+                    elif self.convert == "relative_date_to_date":
+                        return parse_relative_date(text)
+                    elif self.convert == "iso_string_to_date":
+                        return dateutil.parser.isoparse(text)
+                    elif self.convert == "int":
+                        return int(text.replace(',', ''))
+                    else:
+                        raise Exception("Invalid converter")
+                except:
+                    raise OmegaException(
+                        "error", f"Could not convert {text} to {self.convert}")
+
+            if text is None:
+                return None
 
-    # process type conversions
-    if "split" in extractor:
-        split = str.split(
-            text, extractor["split"]["with"] if "with" in extractor["split"] else " ")
-        if extractor["split"]["index"] < len(split):
-            text = split[extractor["split"]["index"]]
+        # process type conversions
+        if self.split is not None:
+            split = str.split(text, self.split_with)
+            if self.split["index"] < len(split):
+                text = split[self.split["index"]]
 
-    if "string_join" in extractor:
-        separator: str = extractor["string_join"]
-        # separator = separator.replace("$line", "\n")
-        text = separator.join(text)
+        if self.string_join is not None:
+            text = self.string_join.join(text)
+
+        if self.validate is not None:
+            if any(x not in text for x in self.validate):
+                return None
 
-    if "validate" in extractor:
-        if any(x not in text for x in extractor["validate"].keys()):
-            return None
         return text
 
-    return text
+
+def extract_text(original_text: Any | None, extractor: ExtractorConfig | Extractor, item: Dict[str, Any]):
+    if not isinstance(extractor, Extractor):
+        extractor = Extractor(extractor)
+    return extractor.extract(original_text, item)
 
 
 def fetch_url(url: str):
@@ -316,7 +516,7 @@ def fetch_url(url: str):
     headers = {
         'User-Agent': linux_useragent}
 
-    response = requests.get(url, headers=headers)
+    response = session.get(url, headers=headers)
 
     # storing the JSON response
     # from url in data
@@ -331,45 +531,34 @@ class Souped:
             raise RuntimeError(f"Expected tag at {selector}")
         self.element: Tag = element
 
-    def extract_field(self, extractor: ExtractorConfig | None, item: Dict[str, Any]):
+    def extract_field(self, extractor: Extractor | ExtractorConfig | None, item: Dict[str, Any]):
         if extractor is not None:
-            # take the raw value
-            if "attribute" in extractor:
-                text = self.attrs[extractor["attribute"]]
-            elif "type" in extractor and extractor["type"] == "text":
-                text = self.text
-            elif "type" in extractor and extractor["type"] == "markdown":
-                text = perfect_string(convert_to_markdown(self.element))
-                text = text.replace("\\", "")
-            elif "type" in extractor and extractor["type"] == "normalised_text":
-                text = str(self.element.contents[0])
-                text = perfect_string(text)
-            else:
-                raise Exception("Invalid extractor type")
+            if not isinstance(extractor, Extractor):
+                extractor = Extractor(extractor)
 
-            # extract the text
-            return extract_text(text, extractor, item)
+            # take the raw value and extract the text
+            return extractor.extract(extractor.raw(self), item)
 
         else:
             return self
 
     def select_one(self, selector: str):
-        return Souped(self.element.select_one(selector), selector)
+        return Souped(compile_selector(selector).select_one(self.element), selector)
 
     def select_one_optional(self, selector: str):
-        element = self.element.select_one(selector)
+        element = compile_selector(selector).select_one(self.element)
         if element is not None:
             return Souped(element, selector)
         return None
 
     def select_text(self, selector: str, default_text: str):
-        item = self.element.select_one(selector)
+        item = compile_selector(selector).select_one(self.element)
         if item is None:
             return default_text
         return item.text
 
     def select(self, selector: str):
-        return [Souped(x, selector) for x in self.element.select(selector)]
+        return [Souped(x, selector) for x in compile_selector(selector).select(self.element)]
 
     def find(self, selector: Any, string: str | None = None):
         if string is not None:
@@ -427,11 +616,205 @@ class Souped:
         return self.element.attrs
 
 
+@lru_cache(maxsize=4096)
+def compile_selector(selector: str) -> soupsieve.SoupSieve:
+    # selectors of a spec are parsed once, not on every select
+    return soupsieve.compile(selector)
+
+
+class DomainIndex:
+    """
+    Configs of the `domains` property indexed by hostname. A page matches the domain
+    of its hostname or of one of its parent domains (`www.adzuna.com.au` matches
+    `adzuna.com.au`), the match is kept for each hostname.
+    """
+
+    def __init__(self, domains: Dict[str, Any]):
+        self.domains = domains
+        self.resolved: Dict[str, str | None] = {}
+
+    def find(self, url: str) -> str | None:
+        host = urlsplit(url).hostname or ""
+        if host not in self.resolved:
+            parts = host.split(".")
+            self.resolved[host] = next(
+                (suffix for suffix in (".".join(parts[i:]) for i in range(len(parts))) if suffix in self.domains), None)
+
+        if self.resolved[host] is not None:
+            return self.resolved[host]
+
+        # domains that are not hostnames (e.g. with a path) are matched anywhere in the url
+        return next((d for d in self.domains if d in url), None)
+
+
 def fetch_soup(url: str):
     data = fetch_url(url)
     return Souped(BeautifulSoup(data, "html.parser"))
 
 
+# tree builders that can be selected with the `parser` option of a spec or of an action,
+# lxml is several times faster than the default pure python parser on large pages
+HTML_PARSERS = ("html.parser", "lxml")
+
+
+def html_parser(shared_config: Dict[str, Any], config: Dict[str, Any]) -> str:
+    parser = config["parser"] if "parser" in config else (
+        shared_config["parser"] if "parser" in shared_config else "html.parser")
+    if parser not in HTML_PARSERS:
+        raise OmegaException(
+            "fatal", f"Unknown parser '{parser}', use one of: {', '.join(HTML_PARSERS)}")
+    return parser
+
+
+def lazy_field(shared_config: Dict[str, Any], config: Dict[str, Any], field: Dict[str, Any]) -> bool:
+    # fields are extracted when they are first read with `lazy` on the field or the action,
+    # or `lazy_fields` on the spec
+    if "lazy" in field:
+        return field["lazy"]
+    if "lazy" in config:
+        return config["lazy"]
+    return shared_config["lazy_fields"] if "lazy_fields" in shared_config else False
+
+
+def parse_soup(data: str, parser: str = "html.parser", parse_only: ElementFilter | None = None) -> Souped:
+    return Souped(BeautifulSoup(data, parser, parse_only=parse_only))
+
+
+compound_pattern = re.compile(r"^([a-z][\w-]*)?((?:[#.][\w-]+|\[[^\]]*\])*)$", re.IGNORECASE)
+part_pattern = re.compile(r"([#.])([\w-]+)|\[\s*([\w-]+)\s*(?:([~|^$*]?=)\s*(\"[^\"]*\"|'[^']*'|[^\]\s'\"]+)\s*)?\]")
+
+AttributeTest = Callable[[str], bool]
+
+attribute_tests: Dict[str, Callable[[str], AttributeTest]] = {
+    "=": lambda v: lambda x: x == v,
+    "~=": lambda v: lambda x: v in x.split(),
+    "|=": lambda v: lambda x: x == v or x.startswith(v + "-"),
+    "^=": lambda v: lambda x: v != "" and x.startswith(v),
+    "$=": lambda v: lambda x: v != "" and x.endswith(v),
+    "*=": lambda v: lambda x: v != "" and v in x,
+}
+
+
+class CompoundSelector:
+    """
+    First compound of a CSS selector (e.g. `h3.title[href*="/job/"]`), tested
+    against the name and raw attributes of a tag while it is being parsed.
+    """
+
+    def __init__(self, tag: str | None, tests: List[Tuple[str, AttributeTest]]):
+        self.tag = tag
+        self.tests = tests
+
+    def matches(self, name: str, attrs: Dict[str, Any]) -> bool:
+        if self.tag is not None and self.tag != name:
+            return False
+        for attribute, test in self.tests:
+            if attribute not in attrs:
+                return False
+            value = attrs[attribute]
+            if not test(" ".join(value) if isinstance(value, list) else value):
+                return False
+        return True
+
+    @staticmethod
+    def parse(text: str) -> "CompoundSelector | None":
+        match = compound_pattern.match(text)
+        if match is None or (match.group(1) is None and match.group(2) == ""):
+            return None
+
+        tests: List[Tuple[str, AttributeTest]] = []
+        for part in part_pattern.finditer(match.group(2)):
+            if part.group(1) == "#":
+                tests.append(("id", attribute_tests["="](part.group(2))))
+            elif part.group(1) == ".":
+                tests.append(("class", attribute_tests["~="](part.group(2))))
+            elif part.group(4) is None:
+                tests.append((part.group(3).lower(), lambda x: True))
+            else:
+                tests.append((part.group(3).lower(), attribute_tests[part.group(4)](part.group(5).strip("\"'"))))
+
+        # every part must have been understood
+        if "".join(x.group(0) for x in part_pattern.finditer(match.group(2))) != match.group(2):
+            return None
+
+        return CompoundSelector(match.group(1).lower() if match.group(1) is not None else None, tests)
+
+
+def split_selector(selector: str) -> List[str]:
+    # split a selector list on the commas that are not in brackets or quotes
+    parts: List[str] = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, char in enumerate(selector):
+        if quote is not None:
+            quote = None if char == quote else quote
+        elif char in "\"'":
+            quote = char
+        elif char in "[(":
+            depth += 1
+        elif char in "])":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(selector[start:i].strip())
+            start = i + 1
+    parts.append(selector[start:].strip())
+    return parts
+
+
+def first_compound(selector: str) -> CompoundSelector | None:
+    # leading compound of a complex selector, when all the matches are inside the tags it matches
+    end = 0
+    depth = 0
+    while end < len(selector) and (depth > 0 or selector[end] not in " \t\n>+~"):
+        depth += 1 if selector[end] == "[" else -1 if selector[end] == "]" else 0
+        end += 1
+
+    # sibling combinators match outside of the first tag
+    if selector[end:].lstrip()[:1] in ("+", "~"):
+        return None
+    if ":root" in selector or ":scope" in selector:
+        return None
+
+    return CompoundSelector.parse(selector[:end])
+
+
+class SelectorFilter(ElementFilter):
+    """
+    Parses only the subtrees that the selectors of a spec can match: top level tags
+    are created only when they match the first compound of one of the selectors,
+    everything inside them is kept. Returns None from `create` when a selector is not
+    understood, so that the page is parsed whole.
+    """
+
+    def __init__(self, compounds: List[CompoundSelector], key: str):
+        super().__init__()
+        self.compounds = compounds
+        self.key = key
+
+    def allow_tag_creation(self, nsprefix: str | None, name: str, attrs: Any) -> bool:
+        attrs = attrs or {}
+        return any(compound.matches(name, attrs) for compound in self.compounds)
+
+    def allow_string_creation(self, string: str) -> bool:
+        return False
+
+    @staticmethod
+    def create(selectors: Iterable[str]) -> "SelectorFilter | None":
+        compounds: List[CompoundSelector] = []
+        texts = sorted({part for selector in selectors for part in split_selector(selector)})
+
+        for text in texts:
+            compound = first_compound(text)
+            if compound is None:
+                return None
+            compounds.append(compound)
+
+        if len(compounds) == 0:
+            return None
+        return SelectorFilter(compounds, ", ".join(texts))
+
+
 def parse_json(text: str):
     try:
         json_object = json.loads(text)
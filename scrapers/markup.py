@@ -0,0 +1,383 @@
+"""
+Markdown and text of an element of a parsed page, produced in one walk of the tree
+that is already parsed. `markdown` follows the rules of `convert_to_markdown` of
+html_to_markdown with its default options, `text` the text that lxml finds in the
+serialised element, without serialising and parsing it again. Neither changes the
+page, which can be shared by other actions. `markdown_text` is the markdown that the
+extractors store, final without a parse of its own.
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, List, Tuple
+
+from bs4 import Comment, Doctype, NavigableString, PageElement, Tag
+
+NESTED_TAGS = {"ol", "ul", "li", "table", "thead", "tbody", "tfoot", "tr", "td", "th"}
+CODE_TAGS = {"pre", "code", "kbd", "samp"}
+INLINE_MARKUP = {
+    "b": "**", "strong": "**", "em": "*", "i": "*", "del": "~~", "s": "~~",
+    "code": "`", "samp": "`", "kbd": "`", "sub": "", "sup": ""
+}
+CONVERTED_TAGS = {
+    *INLINE_MARKUP, "a", "blockquote", "br", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "img", "list",
+    "ul", "ol", "li", "p", "pre", "script", "style", "table", "caption", "figcaption", "td", "th", "tr"
+}
+BULLETS = "*+-"
+
+heading_pattern = re.compile(r"h[1-6]")
+whitespace_pattern = re.compile(r"[\t ]+")
+line_beginning_pattern = re.compile(r"^", re.MULTILINE)
+escape_pattern = re.compile(r"[\\&<`\[>~#=+|*_-]|(?<=[0-9])[.)]")
+
+# tags that lxml parses as they are in the tree of the page, and the children
+# that make it close their parent
+TEXT_TAGS = {
+    "a", "abbr", "acronym", "address", "article", "aside", "b", "bdo", "big", "blockquote", "br", "center",
+    "cite", "code", "dd", "del", "dfn", "div", "dl", "dt", "em", "figcaption", "figure", "font", "footer",
+    "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "i", "img", "ins", "kbd", "label", "li", "main",
+    "mark", "nav", "ol", "p", "pre", "q", "s", "samp", "section", "small", "span", "strike", "strong",
+    "sub", "sup", "time", "tt", "u", "ul", "var"
+}
+CLOSING_TAGS = {
+    "a": {"a"},
+    "address": {"dd", "dl", "dt", "li", "ul"},
+    "b": {"center", "p"}, "big": {"p"}, "i": {"center", "p"}, "s": {"p"}, "small": {"p"},
+    "strike": {"p"}, "tt": {"p"}, "u": {"p"}, "font": {"center"},
+    "dd": {"dt"}, "dl": {"li"}, "dt": {"dd", "dl"},
+    "h1": {"li", "p"}, "h2": {"li", "p"}, "h3": {"li", "p"}, "h4": {"li", "p"}, "h5": {"li", "p"}, "h6": {"li", "p"},
+    "li": {"li"},
+    "p": {"address", "blockquote", "center", "dd", "div", "dl", "dt", "h1", "h2", "h3", "h4", "h5", "h6",
+          "hr", "li", "ol", "p", "pre", "ul"},
+    "pre": {"dd", "dl", "dt", "li", "ul"},
+    "ul": {"address", "pre"},
+}
+# characters that lxml changes in text
+unsafe_pattern = re.compile(r"[\r\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\ufeff\ufffe\uffff\ud800-\udfff]")
+# characters that lxml drops from text
+invalid_pattern = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def is_nested(element: Any) -> bool:
+    return isinstance(element, Tag) and element.name in NESTED_TAGS
+
+
+def escape(text: str) -> str:
+    return escape_pattern.sub(r"\\\g<0>", text) if text else ""
+
+
+def chomp(text: str) -> Tuple[str, str, str]:
+    prefix = " " if text and text[0] == " " else ""
+    suffix = " " if text and text[-1] == " " else ""
+    return prefix, suffix, text.strip()
+
+
+class Markdown:
+    """
+    One conversion of an element. Whitespace between the items of lists and tables,
+    that the library removes from the tree, is skipped in `children` instead.
+    Text is escaped as by the library unless `escaped` is False.
+    """
+
+    def __init__(self, element: Tag, escaped: bool = True):
+        self.children: Dict[int, List[PageElement]] = {}
+        self.escaped = escaped
+
+        # ancestors outside of the converted element
+        names = [element.name] + [parent.name for parent in element.parents]
+        self.outer_pre = "pre" in names
+        self.outer_code = any(name in CODE_TAGS for name in names)
+        self.outer_li = "li" in names
+        self.outer_ul = names.count("ul")
+
+    def convert(self, element: Tag) -> str:
+        parts: List[str] = []
+        before = ""
+        for child in element.contents:
+            if isinstance(child, (Comment, Doctype)):
+                continue
+            if isinstance(child, NavigableString):
+                text = self.text(child, self.outer_pre, self.outer_code)
+            elif isinstance(child, Tag):
+                text = self.tag(child, False, before[-2:], self.outer_pre, self.outer_code,
+                                self.outer_li, self.outer_ul)
+            else:
+                continue
+            parts.append(text)
+            before = (before + text)[-2:]
+        return "".join(parts)
+
+    def siblings(self, element: PageElement) -> List[PageElement]:
+        parent = element.parent
+        if parent is None:
+            return [element]
+        return self.children[id(parent)] if id(parent) in self.children else parent.contents
+
+    def previous(self, element: PageElement) -> PageElement | None:
+        siblings = self.siblings(element)
+        index = next(i for i, x in enumerate(siblings) if x is element)
+        return siblings[index - 1] if index > 0 else None
+
+    def next(self, element: PageElement) -> PageElement | None:
+        siblings = self.siblings(element)
+        index = next(i for i, x in enumerate(siblings) if x is element)
+        return siblings[index + 1] if index + 1 < len(siblings) else None
+
+    def prune(self, tag: Tag) -> List[PageElement]:
+        # the library removes the strings while it iterates the children,
+        # so the string after each removed one is not checked
+        children = list(tag.contents)
+        i = 0
+        while i < len(children):
+            child = children[i]
+            previous = children[i - 1] if i > 0 else None
+            following = children[i + 1] if i + 1 < len(children) else None
+            removable = not previous or not following or is_nested(previous) or is_nested(following)
+            if removable and isinstance(child, NavigableString) and not child.strip():
+                del children[i]
+            i += 1
+        self.children[id(tag)] = children
+        return children
+
+    def text(self, element: NavigableString, pre: bool, code: bool) -> str:
+        text = str(element) or ""
+        if not pre:
+            text = whitespace_pattern.sub(" ", text)
+        if not code and self.escaped:
+            text = escape(text)
+
+        parent = element.parent
+        if parent is not None and parent.name == "li":
+            following = self.next(element)
+            if not following or getattr(following, "name", None) in {"ul", "ol"}:
+                text = text.rstrip()
+        return text
+
+    def tag(self, tag: Tag, inline: bool, before: str, pre: bool, code: bool, li: bool, ul: int) -> str:
+        name = tag.name.lower() if tag.name.lower() in CONVERTED_TAGS else None
+        heading = heading_pattern.match(tag.name) is not None
+        cell = name in {"td", "th"}
+        inline_children = inline or heading or cell
+
+        children = self.prune(tag) if tag.name in NESTED_TAGS else tag.contents
+
+        # state of the children
+        child_pre = pre or tag.name == "pre"
+        child_code = code or tag.name in CODE_TAGS
+        child_li = li or tag.name == "li"
+        child_ul = ul + 1 if tag.name == "ul" else ul
+
+        parts: List[str] = []
+        last = before
+        for child in children:
+            if isinstance(child, (Comment, Doctype)):
+                continue
+            if isinstance(child, NavigableString):
+                text = self.text(child, child_pre, child_code)
+            elif isinstance(child, Tag):
+                text = self.tag(child, inline_children, last[-2:], child_pre, child_code, child_li, child_ul)
+            else:
+                continue
+            parts.append(text)
+            last = (last + text)[-2:]
+
+        text = "".join(parts)
+        if name is None:
+            return text
+
+        rendered = self.render(name, tag, text, inline, code, li or tag.name == "li", ul)
+
+        # headings start after an empty line
+        if heading and before not in {"", "\n"}:
+            lines = 2 - (len(before) - len(before.rstrip("\n")))
+            if lines > 0:
+                return "\n" * lines + rendered
+        return rendered
+
+    def render(self, name: str, tag: Tag, text: str, inline: bool, code: bool, li: bool, ul: int) -> str:
+        if name in INLINE_MARKUP:
+            if code:
+                return text
+            if not text.strip():
+                return ""
+            prefix, suffix, text = chomp(text)
+            markup = INLINE_MARKUP[name]
+            return f"{prefix}{markup}{text}{markup}{suffix}"
+
+        if name == "a":
+            prefix, suffix, text = chomp(text)
+            if not text:
+                return ""
+            href = tag.get("href")
+            title = tag.get("title")
+            if text.replace(r"\_", "_") == href and not title:
+                return f"<{href}>"
+            title_part = ' "{}"'.format(self.quote(title)) if isinstance(title, str) else ""
+            return f"{prefix}[{text}]({href}{title_part}){suffix}" if href else text
+
+        if name == "p":
+            if inline:
+                return text
+            return f"{text}\n\n" if text else ""
+
+        if name in {"ul", "ol", "list"}:
+            following = self.next(tag)
+            before_paragraph = bool(following) and getattr(following, "name", None) not in {"ul", "ol"}
+            if li:
+                return "\n" + (line_beginning_pattern.sub("\t", text) if text else "").rstrip()
+            return text + ("\n" if before_paragraph else "")
+
+        if name == "li":
+            parent = tag.parent
+            if parent is not None and parent.name == "ol":
+                start = parent.get("start")
+                start = int(start) if isinstance(start, str) and start.isnumeric() else 1
+                index = next(i for i, x in enumerate(self.siblings(tag)) if x is tag)
+                bullet = "%s." % (start + index)
+            else:
+                bullet = BULLETS[(ul - 1) % len(BULLETS)]
+            return "{} {}\n".format(bullet, (text or "").strip())
+
+        if name == "br":
+            return "" if inline else "  \n"
+
+        if name in {"h1", "h2", "h3", "h4", "h5", "h6"}:
+            if inline:
+                return text
+            text = text.strip()
+            level = int(name[1])
+            if level <= 2:
+                text = text.rstrip()
+                return f"{text}\n{('=' if level == 1 else '-') * len(text)}\n\n" if text else ""
+            return f"{'#' * level} {text}\n\n"
+
+        if name == "hr":
+            return "\n\n---\n\n"
+
+        if name == "img":
+            alt = tag.attrs.get("alt", "")
+            src = tag.attrs.get("src", "")
+            title = tag.attrs.get("title", "")
+            title_part = ' "{}"'.format(self.quote(title)) if title else ""
+            if inline:
+                return alt
+            return f"![{alt}]({src}{title_part})"
+
+        if name == "blockquote":
+            if inline:
+                return text
+            return f"\n{line_beginning_pattern.sub('> ', text.strip())}\n\n" if text else ""
+
+        if name == "pre":
+            return f"\n```\n{text}\n```\n" if text else ""
+
+        if name in {"script", "style"}:
+            return ""
+
+        if name == "table":
+            return f"\n\n{text}\n"
+        if name == "caption":
+            return f"{text}\n"
+        if name == "figcaption":
+            return f"\n\n{text}\n\n"
+
+        if name in {"td", "th"}:
+            colspan = tag["colspan"] if "colspan" in tag.attrs else None
+            colspan = int(colspan) if isinstance(colspan, str) and colspan.isdigit() else 1
+            return " " + text.strip().replace("\n", " ") + " |" * colspan
+
+        if name == "tr":
+            return self.row(tag, text)
+
+        return text
+
+    def quote(self, title: str) -> str:
+        return title.replace('"', r"\"") if self.escaped else title
+
+    def row(self, tag: Tag, text: str) -> str:
+        cells = tag.find_all(["td", "th"])
+        parent = tag.parent
+        parent_name = parent.name if parent else ""
+        grand_parent = parent.parent if parent else None
+        first = not self.previous(tag)
+
+        head = (
+            all(cell.name == "th" for cell in cells)
+            or (first and parent_name != "tbody")
+            or (first and parent_name == "tbody" and (not grand_parent or len(grand_parent.find_all(["thead"])) < 1))
+        )
+        overline = ""
+        underline = ""
+        if head and first:
+            colspan = 0
+            for cell in cells:
+                if "colspan" in cell.attrs and cell["colspan"].isdigit():
+                    colspan += int(cell["colspan"])
+                else:
+                    colspan += 1
+            underline += "| " + " | ".join(["---"] * colspan) + " |" + "\n"
+        elif first and (parent_name == "table" or (parent_name == "tbody" and parent is not None and not self.previous(parent))):
+            overline += "| " + " | ".join([""] * len(cells)) + " |" + "\n"
+            overline += "| " + " | ".join(["---"] * len(cells)) + " |" + "\n"
+        return overline + "|" + text + "\n" + underline
+
+
+def to_markdown(element: Tag) -> str:
+    return Markdown(element).convert(element)
+
+
+def markdown_text(element: Tag) -> str:
+    """
+    Markdown of the element without escapes and without the characters that lxml
+    drops, normalised like `tidy_string`. Its strings are decoded once by the parser
+    of the page, as for the text of the element. Links that are their own text
+    stay `<url>`.
+    """
+    return tidy_string(invalid_pattern.sub("", Markdown(element, False).convert(element)))
+
+
+def tidy_string(text: str):
+    text = unicodedata.normalize("NFKD", text)
+    text = text.replace(".", ". ")
+    text = text.strip()
+    return text
+
+
+def to_text(element: PageElement) -> str | None:
+    """
+    Text of the element as lxml parses it from the serialised element, with a `.`
+    after each list item that does not end with one. None when the element has
+    content that lxml would parse differently.
+    """
+    parts: List[str] = []
+    if not isinstance(element, Tag) or not collect_text(element, parts):
+        return None
+    return "".join(parts)
+
+
+def collect_text(tag: Tag, parts: List[str]) -> bool:
+    if tag.name not in TEXT_TAGS:
+        return False
+
+    closing = CLOSING_TAGS[tag.name] if tag.name in CLOSING_TAGS else None
+
+    children = [x for x in tag.contents if not (type(x) is NavigableString and x == "")]
+    for child in children:
+        if isinstance(child, Tag):
+            if closing is not None and child.name in closing:
+                return False
+            if not collect_text(child, parts):
+                return False
+        elif type(child) is NavigableString:
+            if unsafe_pattern.search(child) is not None:
+                return False
+            parts.append(str(child))
+        elif type(child) is not Comment:
+            return False
+
+    if tag.name == "li":
+        # the end tag of the item follows its last character
+        if not (len(children) > 0 and type(children[-1]) is NavigableString and children[-1].endswith(".")):
+            parts.append(".")
+    return True
+
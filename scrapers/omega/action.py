@@ -1,30 +1,40 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import random
-import re
 import time
 from abc import ABC, abstractmethod
+from collections import ChainMap, OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Callable, Dict, Generic, List, Type, TypeVar
+from typing import (Any, AsyncIterator, Awaitable, Callable, Dict, Generic,
+                    Iterable, List, Tuple, Type, TypeVar)
 
 from prisma.enums import JobStatus
 
 # import scrapers.queue
 from api.db import connect
-from scrapers.helpers import Souped, find_parent
+from api.employers import EmployerResolver
+from api.jobs import JobBatches
+from api.known_jobs import KnownJobs
+from api.taxonomy import TaxonomyIndex
+from scrapers.helpers import (SelectorFilter, Souped, Template, compile_path,
+                              compile_template, find_parent, linux_useragent,
+                              parse_soup, template_pattern)
 from scrapers.info import ScraperInfo
 from scrapers.omega.config import OmegaActionConfig, get_id_from_name
 from scrapers.omega.exception import OmegaAbort, OmegaException
+from scrapers.omega.expression import compile_expression
+from libs.archive import Archive
+from libs.http_client import HttpClient
+from libs.profiler import Profiler, waiting
+from libs.rate_limit import HostRateLimiter
 from libs.selenium import Selenium
 from libs.progress import ProgressBar
 
 # import scrapers.queue
 
 
-pattern = r"\$\{(.*?)\}"
-
-
 def myconverter(o: Any):
 
     if isinstance(o, datetime):
@@ -43,6 +53,7 @@ class OmegaContext:
         self.warnings: List[str] = []
         self.info: List[str] = []
         self.reports: Dict[str, Any] = {}
+        self.profile = Profiler()
         self.running = True
         self.log = ""
 
@@ -158,9 +169,83 @@ class OmegaContext:
         return result
 
 
+# parsed pages kept by each process
+MAX_DOCUMENTS = 4
+
+
 class AppContext:
-    def __init__(self):
+    def __init__(self, rate_limiter: HostRateLimiter | None = None, archive: Archive | None = None):
         self._selenium: Selenium | None = None
+        self._http: HttpClient | None = None
+        # held by an action for its whole use of the browser, e.g. open, read and close a tab
+        self.browser = asyncio.Lock()
+
+        # shared with the worker processes, so that they respect the same host budget
+        self.rate_limiter = rate_limiter if rate_limiter is not None else HostRateLimiter()
+        # records or replays the pages of the run
+        self.archive = archive
+        # recently parsed pages, by parser and source
+        self._documents: OrderedDict[Tuple[str, str, str], Souped] = OrderedDict()
+        # ids of the employers of the saved jobs
+        self.employers = EmployerResolver()
+        # jobs waiting to be written together, across the tasks of a worker
+        self.jobs = JobBatches(self.employers)
+        # jobs processed before, to skip the listing items that are known
+        self.known_jobs = KnownJobs()
+        # skills and roles by their names, per family
+        self._taxonomies: Dict[str, TaxonomyIndex] = {}
+
+    @property
+    def http(self):
+        if self._http is None:
+            self._http = HttpClient(
+                headers={'User-Agent': linux_useragent},
+                rate_limiter=self.rate_limiter,
+                archive=self.archive
+            )
+        return self._http
+
+    def taxonomy(self, family: str) -> TaxonomyIndex:
+        if family not in self._taxonomies:
+            self._taxonomies[family] = TaxonomyIndex(family)
+        return self._taxonomies[family]
+
+    def parse(self, source: str, parser: str = "html.parser", parse_only: SelectorFilter | None = None) -> Souped:
+        # the same page is often parsed again, e.g. after a click that did not change it,
+        # when Cloudflare let us through on the first check or for a cached listing
+        key = (parser, parse_only.key if parse_only is not None else "", source)
+        if key in self._documents:
+            self._documents.move_to_end(key)
+            return self._documents[key]
+
+        soup = self._documents[key] = parse_soup(source, parser, parse_only)
+        if len(self._documents) > MAX_DOCUMENTS:
+            self._documents.popitem(last=False)
+        return soup
+
+    async def archived(self, kind: str, key: Any, produce: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        # browser pages are recorded with the errors raised while loading them
+        if self.archive is None:
+            with waiting("browser"):
+                return await produce()
+
+        if self.archive.replaying:
+            page = self.archive.lookup(kind, key)
+            if "exception" in page:
+                raise OmegaException(
+                    page["exception"]["severity"], page["exception"]["message"])
+            return page
+
+        try:
+            with waiting("browser"):
+                page = await produce()
+        except OmegaException as e:
+            self.archive.record(kind, key, {"exception": {
+                "severity": e.severity, "message": e.message}})
+            raise
+
+        self.archive.record(kind, key, page)
+        return page
 
     @property
     def selenium(self):
@@ -182,39 +267,134 @@ class AppContext:
 
         return self._selenium
 
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+
     def cleanup(self):
         if self._selenium is not None:
             print("💀 Kill Selenium")
             self._selenium.quit()
 
+        if self.archive is not None:
+            self.archive.close()
+
+
+class Lazy:
+    """
+    Value of a field that is computed when it is read for the first time.
+    """
+    __slots__ = ("compute",)
+
+    def __init__(self, compute: Callable[[], Any]):
+        self.compute = compute
+
+
+class Scope(ChainMap[str, Any]):
+    """
+    Fields of a record, layered for the clones. Lazy values are computed on their
+    first read and replaced by the result in the layer that holds them.
+    """
+
+    def __getitem__(self, key: str) -> Any:
+        for mapping in self.maps:
+            if key in mapping:
+                value = mapping[key]
+                if isinstance(value, Lazy):
+                    value = mapping[key] = value.compute()
+                return value
+        return self.__missing__(key)
+
+
+# config keys naming the fields that an action reads or writes
+READ_KEYS = {"source_field", "title_field", "description_field", "field", "root", "fallback"}
+WRITE_KEYS = {"target_field", "index_field", "count_field", "url_field"}
+# fields read by every action when it records an error on the processed job
+ERROR_FIELDS = ["processedJobId", "jobId"]
+
+
+def field_name(path: str) -> str:
+    # top level field of a path, e.g. `job` for `?job.result.title`
+    return compile_path(path).parts[0]
+
+
+def config_fields(config: Any) -> Tuple[List[str], List[str]]:
+    # fields read and written according to the config of an action, without its children
+    read: List[str] = []
+    written: List[str] = []
+
+    def scan(value: Any, key: str | None):
+        if isinstance(value, dict):
+            for k, v in value.items():
+                if k != "CHILDREN":
+                    scan(v, k)
+        elif isinstance(value, list):
+            for v in value:
+                scan(v, key)
+        elif isinstance(value, str):
+            if key in READ_KEYS:
+                read.append(field_name(value))
+            elif key in WRITE_KEYS:
+                written.append(value)
+            read.extend(field_name(path) for path in template_pattern.findall(value) if path != "")
+
+    scan(config, None)
+    return read, written
+
 
 class OmegaItem:
-    def __init__(self, context: OmegaContext, app: AppContext, item: Dict[str, Any] = {}) -> None:
+    """
+    Record processed by the actions. Clones share their parent's fields through a
+    layered scope, writes of the clone only go to its own (top) layer. Source and
+    soup are resolved through the parent until the clone loads its own page.
+    """
+    __slots__ = ("context", "app", "item", "parent",
+                 "_source", "_soup", "url", "current_url")
+
+    def __init__(self, context: OmegaContext, app: AppContext, item: Dict[str, Any] | Scope | None = None, parent: OmegaItem | None = None) -> None:
         self.context = context
-        self.source: str = ""
-        self.item = item
-        self.soup: Souped = None  # type:ignore
-        self.url: str = ""
-        self.current_url: str = ""
         self.app: AppContext = app
+        self.item: Scope = item if isinstance(
+            item, Scope) else Scope(item if item is not None else {})
+        self.parent = parent
+        self._source: Any = None
+        self._soup: Souped | None = None
+        self.url: str = parent.url if parent is not None else ""
+        self.current_url: str = parent.current_url if parent is not None else ""
 
-    def clone(self):
-        clone = OmegaItem(self.context, self.app)
+    @property
+    def source(self) -> Any:
+        omega = self
+        while omega._source is None and omega.parent is not None:
+            omega = omega.parent
+        return omega._source if omega._source is not None else ""
 
-        clone.source = self.source
-        clone.item = self.item.copy()
-        clone.soup = self.soup
-        clone.url = self.url
-        clone.current_url = self.current_url
+    @source.setter
+    def source(self, value: Any):
+        self._source = value
 
-        return clone
+    @property
+    def soup(self) -> Souped:
+        omega = self
+        while omega._soup is None and omega.parent is not None:
+            omega = omega.parent
+        return omega._soup  # type: ignore
 
-    def __string_replacement(self, match: re.Match[str]):
-        return str(find_parent(match.group(1), self.item))
+    @soup.setter
+    def soup(self, value: Souped):
+        self._soup = value
 
-    def parse_string(self, string: str):
-        result = re.sub(pattern, self.__string_replacement, string)
-        return result
+    def clone(self):
+        return OmegaItem(self.context, self.app, self.item.new_child(), self)
+
+    def flatten(self) -> Dict[str, Any]:
+        # plain dictionary with all the visible fields, e.g. for serialisation
+        return dict(self.item)
+
+    def parse_string(self, string: str | Template):
+        if isinstance(string, str):
+            string = compile_template(string)
+        return string.render(self.item)
 
     def resolve(self, path: str):
         return find_parent(path, self.item)
@@ -225,12 +405,18 @@ U = TypeVar("U", bound=OmegaActionConfig)
 
 
 class OmegaAction(ABC, Generic[T]):
+    # the action works on the page that an earlier action left in the browser
+    reads_browser_page = False
 
     def __init__(self, config: T, shared_config: Any, repository: ActionRepository):
         self.config = config
         self.shared_config = shared_config
         self.repository = repository
         self.children: List[OmegaAction[Any]] | None = None
+        # actions are profiled by their name in the spec
+        self.name: str = config["name"] if "name" in config else type(self).__name__  # type: ignore
+        self.condition = compile_expression(
+            config["if"]) if "if" in config else None  # type: ignore
 
     def get_int_config(self, name: str, omega: OmegaItem, default: int = 0) -> int:
         result: int = default
@@ -265,6 +451,21 @@ class OmegaAction(ABC, Generic[T]):
     async def init(self):
         pass
 
+    def soup_selectors(self) -> List[str] | None:
+        # selectors that the action runs on the page, None when they cannot be known
+        return []
+
+    def restrict_parsing(self, parse_only: SelectorFilter):
+        # actions loading pages parse only the parts matched by the spec
+        pass
+
+    def fields_read(self) -> List[str] | None:
+        # fields of the record that the action reads, None when it reads all of them
+        return config_fields(self.config)[0]
+
+    def fields_written(self) -> List[str]:
+        return config_fields(self.config)[1]
+
     @abstractmethod
     async def _execute(self, omega: OmegaItem):
         pass
@@ -294,6 +495,22 @@ class OmegaAction(ABC, Generic[T]):
             for child in self.children:
                 await child.init()
 
+            if "concurrency" in self.config and self.config["concurrency"] > 1:  # type: ignore
+                shared = [x.name for x in self.descendants() if x.reads_browser_page]
+                if len(shared) > 0:
+                    raise OmegaException(
+                        "fatal",
+                        f"{self.name} cannot run its children concurrently, {', '.join(shared)} read the page left in the browser")
+
+    def descendants(self) -> List["OmegaAction[Any]"]:
+        actions: List[OmegaAction[Any]] = []
+        pending: List[OmegaAction[Any]] = [*(self.children or [])]
+        while len(pending) > 0:
+            action = pending.pop()
+            actions.append(action)
+            pending.extend(action.children or [])
+        return actions
+
     async def update_processed_job(self, omega: OmegaItem, status: JobStatus, message: str):
 
         if len(message) > 187:
@@ -301,16 +518,17 @@ class OmegaAction(ABC, Generic[T]):
 
         prisma = await connect()
 
-        if "processedJobId" in omega.item:
-            existing = await prisma.processedjob.find_first(where={
-                "id": omega.item["processedJobId"]
-            })
-        elif "jobId" in omega.item:
-            existing = await prisma.processedjob.find_first(where={
-                "jobId": str(omega.item["jobId"])
-            })
-        else:
-            existing = None
+        with waiting("db"):
+            if "processedJobId" in omega.item:
+                existing = await prisma.processedjob.find_first(where={
+                    "id": omega.item["processedJobId"]
+                })
+            elif "jobId" in omega.item:
+                existing = await prisma.processedjob.find_first(where={
+                    "jobId": str(omega.item["jobId"])
+                })
+            else:
+                existing = None
 
         if existing is not None:
             data = json.loads(existing.data)
@@ -321,17 +539,23 @@ class OmegaAction(ABC, Generic[T]):
                 if "processed" in self.shared_config:
                     if key in self.shared_config["processed"]["ignore"]:
                         continue
+                    try:
+                        value = omega.item[key]
+                    except Exception:
+                        # a lazy field that fails to compute, e.g. the cause of this error
+                        continue
                     data[self.shared_config["processed"]
-                         ["target"]][key] = omega.item[key]
-
-            await prisma.processedjob.update(
-                where={"id": existing.id},
-                data={
-                    "status": status,
-                    "message": message,
-                    "data": json.dumps(data, default=myconverter)
-                }
-            )
+                         ["target"]][key] = value
+
+            with waiting("db"):
+                await prisma.processedjob.update(
+                    where={"id": existing.id},
+                    data={
+                        "status": status,
+                        "message": message,
+                        "data": json.dumps(data, default=myconverter)
+                    }
+                )
 
     def raise_exception(self, e: Exception):
         # type: ignore
@@ -383,19 +607,75 @@ class OmegaAction(ABC, Generic[T]):
             self.raise_exception(OmegaException('abort', message))
 
     async def execute(self, omega: OmegaItem):
-        await self.__execute_process(self._execute, omega)
+        with omega.context.profile.measure(self.name, omega.item):
+            await self.__execute_process(self._execute, omega)
 
     async def __execute_children_safe(self, omega: OmegaItem):
         if self.children is not None:
             for child in self.children:
-                if "if" in child.config:
-                    if not eval(omega.parse_string(child.config["if"])):
+                if child.condition is not None:
+                    if not child.condition.evaluate(omega.item):
                         continue
-                await child._execute(omega)
+                with omega.context.profile.measure(child.name, omega.item):
+                    await child._execute(omega)
 
     async def execute_children(self, omega: OmegaItem):
         await self.__execute_process(self.__execute_children_safe, omega)
 
+    async def execute_children_each(self, items: Iterable[OmegaItem], concurrency: int = 1):
+        # execute children for each item, running at most `concurrency` subtrees at the same time
+        if concurrency <= 1:
+            for item in items:
+                await self.execute_children(item)
+            return
+
+        iterator = iter(items)
+
+        async def next_item() -> OmegaItem | None:
+            return next(iterator, None)
+
+        await self.execute_children_concurrently(next_item, concurrency)
+
+    async def execute_children_stream(self, items: AsyncIterator[OmegaItem], concurrency: int = 1):
+        # same as execute_children_each for items that arrive while the children run
+        if concurrency <= 1:
+            async for item in items:
+                await self.execute_children(item)
+            return
+
+        # one worker at a time reads the next item
+        lock = asyncio.Lock()
+
+        async def next_item() -> OmegaItem | None:
+            async with lock:
+                return await anext(items, None)
+
+        await self.execute_children_concurrently(next_item, concurrency)
+
+    async def execute_children_concurrently(self, next_item: Callable[[], Awaitable[OmegaItem | None]], concurrency: int):
+        # a failure stops handing out items, the records already running finish their subtree
+        # and the first error is raised, as in the sequential loop
+        errors: List[BaseException] = []
+
+        async def worker():
+            while len(errors) == 0:
+                try:
+                    item = await next_item()
+                    if item is None:
+                        return
+                    await self.execute_children(item)
+                except Exception as e:
+                    errors.append(e)
+                    raise
+
+        # cancelling the fan-out cancels the workers
+        results = await asyncio.gather(*[worker() for _ in range(concurrency)], return_exceptions=True)
+        if len(errors) > 0:
+            raise errors[0]
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
 
 class SharedOmegaAction(OmegaAction[T], Generic[T, U]):
 
@@ -9,6 +9,8 @@ from typing_extensions import NotRequired, TypedDict
 class OmegaActionConfig(TypedDict):
     name: str
     boundary: NotRequired[bool]
+    # number of child subtrees executed at the same time by fan-out actions
+    concurrency: NotRequired[int]
     CHILDREN: NotRequired[List[OmegaActionConfig]]
 
 
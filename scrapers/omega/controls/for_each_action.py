@@ -1,6 +1,6 @@
 from typing_extensions import NotRequired
 
-from scrapers.helpers import find_parent
+from scrapers.helpers import compile_path, compile_template
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 
@@ -16,22 +16,28 @@ class ForEachAction(OmegaAction[CustomConfig]):
     uid = "jobiq.controls.for_each"
 
     async def init(self):
+        self.source_field = compile_path(self.config["source_field"])
+        self.record_count = compile_template(
+            self.config["record_count"]) if "record_count" in self.config else None
+        self.concurrency = self.config["concurrency"] if "concurrency" in self.config else 1
 
         await super().init_children()
 
     async def _execute(self, omega: OmegaItem):
 
-        values = find_parent(self.config["source_field"], omega.item)
+        values = self.source_field.resolve(omega.item)
 
         # if record_count is specified, set the count
-        if "record_count" in self.config:
-            page_count = int(omega.parse_string(self.config["record_count"]))
+        if self.record_count is not None:
+            page_count = int(omega.parse_string(self.record_count))
             omega.context.total_records = page_count * len(values)
 
-        i = 0
-        for i, value in enumerate(values):
-            new_item = omega.clone()
-            if "index_field" in self.config:
-                new_item.item[self.config["index_field"]] = i
-            new_item.item[self.config["target_field"]] = value
-            await self.execute_children(new_item)
+        def items():
+            for i, value in enumerate(values):
+                new_item = omega.clone()
+                if "index_field" in self.config:
+                    new_item.item[self.config["index_field"]] = i
+                new_item.item[self.config["target_field"]] = value
+                yield new_item
+
+        await self.execute_children_each(items(), self.concurrency)
@@ -2,6 +2,7 @@ from typing_extensions import NotRequired
 
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
+from scrapers.omega.expression import compile_expression
 
 
 class CustomConfig(OmegaActionConfig):
@@ -14,10 +15,12 @@ class IfAction(OmegaAction[CustomConfig]):
     uid = "jobiq.controls.if"
 
     async def init(self):
+        self.expression = compile_expression(self.config["condition"])
+
         await super().init_children()
 
     async def _execute(self, omega: OmegaItem):
-        should_execute = eval(omega.parse_string(self.config["condition"]))
+        should_execute = self.expression.evaluate(omega.item)
 
         if should_execute:
             await self.execute_children(omega)
@@ -1,5 +1,6 @@
 from typing_extensions import NotRequired
 
+from scrapers.helpers import compile_template
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 
@@ -15,15 +16,20 @@ class Repeat(OmegaAction[CustomConfig]):
 
     async def init(self):
 
-        self.count = self.config["count"]
+        self.count = compile_template(self.config["count"])
         self.start = self.config["start_index"] if "start_index" in self.config else 0
         self.index_field = self.config["index_field"]
+        self.concurrency = self.config["concurrency"] if "concurrency" in self.config else 1
 
         await super().init_children()
 
     async def _execute(self, omega: OmegaItem):
         count = int(omega.parse_string(self.count))
-        for i in range(self.start, count + self.start):
-            new_item = omega.clone()
-            new_item.item[self.index_field] = i
-            await self.execute_children(new_item)
+
+        def items():
+            for i in range(self.start, count + self.start):
+                new_item = omega.clone()
+                new_item.item[self.index_field] = i
+                yield new_item
+
+        await self.execute_children_each(items(), self.concurrency)
@@ -1,5 +1,6 @@
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
+from scrapers.omega.expression import compile_expression
 
 
 class CustomConfig(OmegaActionConfig):
@@ -10,7 +11,8 @@ class CustomConfig(OmegaActionConfig):
 class EvalAction(OmegaAction[CustomConfig]):
     uid = "jobiq.eval"
 
+    async def init(self):
+        self.expression = compile_expression(self.config["expression"])
+
     async def _execute(self, omega: OmegaItem):
-        omega.item[self.config["target_field"]] = eval(
-            omega.parse_string(self.config["expression"])
-        )
+        omega.item[self.config["target_field"]] = self.expression.evaluate(omega.item)
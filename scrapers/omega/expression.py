@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import builtins
+import io
+import json
+import random
+import re
+import time
+import tokenize
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+from scrapers.helpers import PathAccessor, compile_path, compile_template, template_pattern
+
+# names that can be used by spec expressions, same as when they were evaluated in the action modules
+namespace: Dict[str, Any] = {
+    "__builtins__": builtins,
+    "datetime": datetime,
+    "timedelta": timedelta,
+    "json": json,
+    "random": random,
+    "re": re,
+    "time": time,
+}
+
+# names that do not change the result of an expression between two evaluations
+pure_names = {
+    "str", "int", "float", "bool", "len", "abs", "min", "max", "round",
+    "lower", "upper", "strip", "startswith", "endswith", "isdigit"
+}
+
+# a placeholder that is the whole string literal, e.g. "${path}"
+quoted_pattern = re.compile(r"([\"'])\$\{([^}]*)\}\1")
+# characters that make a pasted value part of a longer token, e.g. ${a}.${b} or ${a}0
+token_pattern = re.compile(r"[\w.$]")
+
+# results that can be shared by the records, the others are computed for each record
+immutable_types = (type(None), bool, int, float, complex, str, bytes, datetime, timedelta)
+
+MAX_RESULTS = 1024
+
+
+@lru_cache(maxsize=1024)
+def compile_source(text: str):
+    return compile(text, f"<{text}>", "eval")
+
+
+def paste(text: str) -> Any:
+    # value pasted as source text, e.g. "True" or "3"
+    return eval(compile_source(text), namespace)
+
+
+def immutable(value: Any) -> bool:
+    if type(value) in (tuple, frozenset):
+        return all(immutable(x) for x in value)
+    return type(value) in immutable_types
+
+
+def as_text(value: Any) -> Any:
+    return str(value)
+
+
+def as_source(value: Any) -> Any:
+    if value is None or type(value) in (bool, int, float):
+        return value
+    return paste(str(value))
+
+
+class Expression:
+    """
+    Python expression with `${path}` placeholders (`if`, `condition`, `expression`).
+
+    Placeholders are bound as variables so the code is compiled only once. A quoted
+    placeholder (`"${path}"`) binds the value as text, a bare one binds the value as
+    if it was pasted in the source. Expressions that cannot be bound (placeholders
+    inside longer string literals or next to a dot, a digit or a name) are rendered
+    and compiled once per distinct text.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.bindings: List[Tuple[str, PathAccessor, Callable[[Any], Any]]] = []
+        self.results: Dict[Tuple[Any, ...], Any] = {}
+
+        def bind(path: str, convert: Callable[[Any], Any]):
+            name = f"__v{len(self.bindings)}"
+            self.bindings.append((name, compile_path(path), convert))
+            return name
+
+        code = quoted_pattern.sub(lambda m: bind(m.group(2), as_text), source)
+        pasted = any(self.adjacent(code, m) for m in template_pattern.finditer(code))
+        code = template_pattern.sub(lambda m: bind(m.group(1), as_source), code)
+
+        names = {name for name, _, _ in self.bindings}
+        if pasted or (len(names) > 0 and not names <= set(self.names(code))):
+            # some placeholders were inside string literals or longer tokens, fall back to text replacement
+            self.bindings = []
+            self.code = None
+            self.template = compile_template(source)
+            self.pure = False
+            return
+
+        self.template = None
+        self.code = compile_source(code)
+        self.pure = all(name in names or name in pure_names for name in self.code.co_names)
+
+    @staticmethod
+    def adjacent(code: str, match: re.Match[str]):
+        before = code[match.start() - 1] if match.start() > 0 else ""
+        after = code[match.end()] if match.end() < len(code) else ""
+        return token_pattern.match(before) is not None or token_pattern.match(after) is not None
+
+    @staticmethod
+    def names(code: str):
+        try:
+            return [token.string for token in tokenize.generate_tokens(io.StringIO(code).readline) if token.type == tokenize.NAME]
+        except (tokenize.TokenError, SyntaxError):
+            return []
+
+    def evaluate(self, item: Any) -> Any:
+        if self.code is None:
+            return paste(self.template.render(item))  # type: ignore
+
+        values = tuple(convert(accessor.resolve(item)) for _, accessor, convert in self.bindings)
+
+        if not self.pure:
+            return self.run(values)
+
+        # 1, 1.0 and True are equal but do not give the same result
+        key = tuple((type(value), value) for value in values)
+        try:
+            return self.results[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable values cannot be cached
+            return self.run(values)
+
+        result = self.run(values)
+        if immutable(result):
+            if len(self.results) >= MAX_RESULTS:
+                self.results.clear()
+            self.results[key] = result
+        return result
+
+    def run(self, values: Tuple[Any, ...]) -> Any:
+        return eval(self.code, namespace, {name: value for (name, _, _), value in zip(self.bindings, values)})  # type: ignore
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(source: str) -> Expression:
+    return Expression(source)
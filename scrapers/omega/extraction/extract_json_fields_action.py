@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from typing import Any, List
+from functools import partial
+from typing import Any, Dict, List
 
 from typing_extensions import NotRequired
 
-from scrapers.helpers import ExtractorConfig, extract_text, find_parent
-from scrapers.omega.action import OmegaAction, OmegaItem
+from scrapers.helpers import Extractor, ExtractorConfig, compile_path, lazy_field
+from scrapers.omega.action import Lazy, OmegaAction, OmegaItem, field_name
 from scrapers.omega.config import OmegaActionConfig
 
 
@@ -17,60 +18,91 @@ class FieldConfig(ExtractorConfig):
     separator: NotRequired[str]
 
 
+class JsonField:
+    """
+    Field of the config with its path and extractor compiled, joined fields included.
+    """
+
+    def __init__(self, config: FieldConfig):
+        self.config = config
+        self.selector = compile_path(config["selector"]) if "selector" in config else None
+        self.extractor = Extractor(config)
+        self.join = [JsonField(x) for x in config["join"]] if "join" in config else None
+
+
 class CustomConfig(OmegaActionConfig):
     root: str
     fields: List[FieldConfig]
+    lazy: NotRequired[bool]
 
 
 class ExtractJsonFieldsAction(OmegaAction[CustomConfig]):
     uid = "jobiq.extract.json_fields"
 
     async def init(self):
-        self.fields = self.config["fields"] if "fields" in self.config else []
-
-    async def combine_fields(self, root: Any, omega: OmegaItem, separator: str, fields: List[FieldConfig]):
+        self.root = compile_path(self.config["root"]) if "root" in self.config else None
+        self.fields = [JsonField(x) for x in self.config["fields"]] if "fields" in self.config else []
+        self.lazy = [lazy_field(self.shared_config, self.config, field.config) for field in self.fields]
+
+    def fields_read(self):
+        read = super().fields_read() or []
+        if "root" not in self.config:
+            # selectors start at the record
+            pending = [*self.config["fields"]] if "fields" in self.config else []
+            while len(pending) > 0:
+                field = pending.pop()
+                if "selector" in field:
+                    read.append(field_name(field["selector"]))
+                pending.extend(field["join"] if "join" in field else [])
+        return read
+
+    def combine_fields(self, root: Any, item: Dict[str, Any], separator: str, fields: List[JsonField]):
         combined: List[str] = []
         for field in fields:
 
-            if "target_field" in field:
+            if "target_field" in field.config:
                 raise Exception(
                     "When combining fields we do not expect a target field")
 
-            if "selector" in field:
-                item = find_parent(field["selector"], root)
-                extracted = extract_text(item, field, omega.item)
+            if field.selector is not None:
+                value = field.selector.resolve(root)
+                extracted = field.extractor.extract(value, item)
 
                 if extracted is None:
                     continue
 
                 # we only append if the field is not a join field
-                if "join" not in field:
+                if field.join is None:
                     combined.append(extracted)
 
-            if "join" in field:
-                result = await self.combine_fields(root, omega, separator, field["join"])
+            if field.join is not None:
+                result = self.combine_fields(root, item, separator, field.join)
                 combined.append(result)
 
-            if "value" in field:
-                combined.append(field["value"])
+            if "value" in field.config:
+                combined.append(field.config["value"])
 
         return str.join(separator, combined)
 
+    def extract(self, root: Any, item: Dict[str, Any], field: JsonField):
+        if field.selector is not None:
+            value = field.selector.resolve(root)
+            return field.extractor.extract(value, item)
+
+        separator = self.config["separator"] if "separator" in self.config else "\n"
+        combined = self.combine_fields(root, item, separator, field.join or [])
+        return field.extractor.extract(combined, item)
+
     async def _execute(self, omega: OmegaItem):
-        root = find_parent(
-            self.config["root"], omega.item) if "root" in self.config else omega.item
-
-        for field in self.fields:
-            if "selector" in field:
-                item = find_parent(field["selector"], root)
-                extracted = extract_text(item, field, omega.item)
-                omega.item[field["target_field"]] = extracted
-            elif "join" in field:
-                separator = self.config["separator"] if "separator" in self.config else "\n"
-                combined = await self.combine_fields(root, omega, separator, field["join"])
-                extracted = extract_text(combined, field, omega.item)
-                omega.item[field["target_field"]] = extracted
-            elif "value" in field:
-                omega.item[field["target_field"]] = field["value"]
+        root = self.root.resolve(omega.item) if self.root is not None else omega.item
+
+        for field, lazy in zip(self.fields, self.lazy):
+            if field.selector is not None or field.join is not None:
+                if lazy:
+                    omega.item[field.config["target_field"]] = Lazy(partial(self.extract, root, omega.item, field))
+                else:
+                    omega.item[field.config["target_field"]] = self.extract(root, omega.item, field)
+            elif "value" in field.config:
+                omega.item[field.config["target_field"]] = field.config["value"]
             else:
                 raise Exception("Invalid field configuration")
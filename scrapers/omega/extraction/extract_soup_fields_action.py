@@ -1,7 +1,10 @@
-from typing import List
+from functools import partial
+from typing import Any, Dict, List
 
-from scrapers.helpers import ExtractorConfig
-from scrapers.omega.action import OmegaAction, OmegaItem
+from typing_extensions import NotRequired
+
+from scrapers.helpers import DomainIndex, Extractor, ExtractorConfig, Souped, lazy_field
+from scrapers.omega.action import Lazy, OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 from scrapers.omega.exception import OmegaException
 
@@ -13,6 +16,7 @@ class FieldConfig(ExtractorConfig):
 
 class CustomConfig(OmegaActionConfig):
     fields: List[FieldConfig]
+    lazy: NotRequired[bool]
 
 
 class ExtractSoupFieldsAction(OmegaAction[CustomConfig]):
@@ -20,29 +24,57 @@ class ExtractSoupFieldsAction(OmegaAction[CustomConfig]):
 
     async def init(self):
         self.fields = self.config["fields"] if "fields" in self.config else []
+        self.extractors = [Extractor(field) for field in self.fields]
+        # key of the selector in the domain config for `domain#key` selectors
+        self.domain_keys = [
+            field["selector"].split("#")[1] if "domain#" in field["selector"] else None for field in self.fields]
+        self.domains = DomainIndex(self.shared_config["domains"]) if "domains" in self.shared_config else None
+        self.lazy = [lazy_field(self.shared_config, self.config, field) for field in self.fields]
+
+    def soup_selectors(self):
+        selectors: List[str] = []
+        for field in self.fields:
+            if "domain#" in field["selector"]:
+                if "domains" not in self.shared_config:
+                    return None
+                # any of the domains can be loaded
+                key = field["selector"].split("#")[1]
+                selectors.extend(domain[key] for domain in self.shared_config["domains"].values() if key in domain)
+            else:
+                selectors.append(field["selector"])
+        return selectors
+
+    def find_domain(self, omega: OmegaItem) -> Dict[str, Any]:
+        domain_name = self.domains.find(omega.current_url) if self.domains is not None else None
+        if domain_name is None:
+            raise OmegaException(
+                "error", f"Domain not found in {omega.current_url}")
+        return self.shared_config["domains"][domain_name]
 
     async def _execute(self, omega: OmegaItem):
+        # the domain of the page is found once for all its fields
+        domain: Dict[str, Any] | None = None
 
-        for field in self.fields:
+        for field, extractor, key, lazy in zip(self.fields, self.extractors, self.domain_keys, self.lazy):
             selector = field["selector"]
-            
+
             # we can select by domains
-            if "domain#" in field["selector"]:
-                # find domain
-                domain_name = next(
-                    (d for d in self.shared_config["domains"] if d in omega.current_url), None)
-                if domain_name is None:
-                    raise OmegaException(
-                        "error", f"Domain not found in {omega.current_url}")
-                # split selector by #
-                domain = self.shared_config["domains"][domain_name]
-                item = field["selector"].split("#")
+            if key is not None:
+                if domain is None:
+                    domain = self.find_domain(omega)
                 # get the selector
-                if item[1] not in domain:
+                if key not in domain:
                     raise OmegaException(
-                        "error", f"Selector {item[1]} not found in {domain}")
-                selector = domain[item[1]]
-            
-            soup = omega.soup.select_one(selector)
-            extracted = soup.extract_field(field, omega.item)
-            omega.item[field["target_field"]] = extracted
+                        "error", f"Selector {key} not found in {domain}")
+                selector = domain[key]
+
+            if lazy:
+                # the page of the record is kept until the field is read
+                omega.item[field["target_field"]] = Lazy(partial(
+                    self.extract, omega.soup, selector, extractor, omega.item))
+            else:
+                omega.item[field["target_field"]] = self.extract(omega.soup, selector, extractor, omega.item)
+
+    def extract(self, page: Souped, selector: str, extractor: Extractor, item: Dict[str, Any]):
+        soup = page.select_one(selector)
+        return soup.extract_field(extractor, item)
@@ -2,7 +2,7 @@ from typing import List
 
 from typing_extensions import NotRequired
 
-from scrapers.helpers import ExtractorConfig
+from scrapers.helpers import Extractor, ExtractorConfig, compile_template
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 
@@ -31,9 +31,22 @@ class ExtractSoupGroupsAction(OmegaAction[CustomConfig]):
         self.selector = self.config["selector"]
         self.target_field = self.config["target_field"]
         self.fields = self.config["fields"] if "fields" in self.config else []
+        self.extractor = Extractor(self.config)
+        self.extractors = [Extractor(field) for field in self.fields]
+        self.record_count = compile_template(
+            self.config["record_count"]) if "record_count" in self.config else None
+        self.concurrency = self.config["concurrency"] if "concurrency" in self.config else 1
 
         await super().init_children()
 
+    def fields_written(self):
+        # the fields of each group are set in the group, not in the record
+        return [self.config["target_field"], *([self.config["count_field"]] if "count_field" in self.config else [])]
+
+    def soup_selectors(self):
+        # fields are selected inside the groups
+        return [self.selector]
+
     async def _execute(self, omega: OmegaItem):
         
 
@@ -45,43 +58,47 @@ class ExtractSoupGroupsAction(OmegaAction[CustomConfig]):
             omega.item[self.config["count_field"]] = len(soups)
 
         # if record_count is specified, set the count
-        if "record_count" in self.config:
-            page_count = int(omega.parse_string(self.config["record_count"]))
+        if self.record_count is not None:
+            page_count = int(omega.parse_string(self.record_count))
             omega.context.total_records = page_count * len(soups)
 
         found = False
 
-        # in each selected field extract what is necessary
-        for parent in soups:
-
-            # first extract the field
-            if len(self.fields) == 0:
-                item = parent.extract_field(self.config, omega.item)
-            else:
-                item = {}
-                # construct the new field
-                for field in self.fields:
-                    soup = parent.select_one(field["selector"])
-                    extracted = soup.extract_field(field, omega.item)
-                    item[field["target_field"]] = extracted
-
-            # if we have no value we may choose to skip
-            if item is None and "on_none" in self.config:
-                if self.config["on_none"] == "skip":
-                    continue
-
-            # now process the children with the new context
-            child_item = omega.clone()
-            child_item.item[self.target_field] = item
-
-            await self.execute_children(child_item)
-
-            found = True
-
-            # we can stop after first item
-            if "on_value" in self.config and item is not None:
-                if self.config["on_value"] == "break":
-                    break
+        def items():
+            nonlocal found
+
+            # in each selected field extract what is necessary
+            for parent in soups:
+
+                # first extract the field
+                if len(self.fields) == 0:
+                    item = parent.extract_field(self.extractor, omega.item)
+                else:
+                    item = {}
+                    # construct the new field
+                    for field, extractor in zip(self.fields, self.extractors):
+                        soup = parent.select_one(field["selector"])
+                        extracted = soup.extract_field(extractor, omega.item)
+                        item[field["target_field"]] = extracted
+
+                # if we have no value we may choose to skip
+                if item is None and "on_none" in self.config:
+                    if self.config["on_none"] == "skip":
+                        continue
+
+                # now process the children with the new context
+                child_item = omega.clone()
+                child_item.item[self.target_field] = item
+
+                found = True
+                yield child_item
+
+                # we can stop after first item, no further items are scheduled
+                if "on_value" in self.config and item is not None:
+                    if self.config["on_value"] == "break":
+                        break
+
+        await self.execute_children_each(items(), self.concurrency)
 
         if found is False:
             raise Exception(
@@ -0,0 +1,59 @@
+import asyncio
+from typing import Set
+
+from typing_extensions import NotRequired
+
+from api.db import connect
+from scrapers.helpers import compile_path
+from scrapers.omega.action import OmegaAction, OmegaItem
+from scrapers.omega.config import OmegaActionConfig
+
+
+class CustomConfig(OmegaActionConfig):
+    source_field: str
+    # the list is replaced when it is not set
+    target_field: NotRequired[str]
+    # path of the job id in an element, the element is the id when it is not set
+    selector: NotRequired[str]
+
+
+class FilterProcessedJobs(OmegaAction[CustomConfig]):
+    """
+    Removes the jobs processed before from a listing with one query for the whole
+    page, so that the known jobs are not fetched and checked one by one.
+    """
+    uid = "jobiq.filter_processed_jobs"
+
+    async def init(self):
+        self.prisma = await connect()
+        self.source_field = compile_path(self.config["source_field"])
+        self.target_field = self.config["target_field"] if "target_field" in self.config else self.config["source_field"]
+        self.selector = compile_path(self.config["selector"]) if "selector" in self.config else None
+        # the index of the known jobs is brought up to date once per run, by the first page
+        self.refreshed = False
+        self.refreshing = asyncio.Lock()
+
+    async def _execute(self, omega: OmegaItem):
+        values = self.source_field.resolve(omega.item)
+        ids = [str(self.selector.resolve(value) if self.selector is not None else value) for value in values]
+
+        known = omega.app.known_jobs
+        scraper_id = omega.context.scraper.id
+
+        if not self.refreshed:
+            async with self.refreshing:
+                if not self.refreshed:
+                    await known.refresh(self.prisma, scraper_id)
+                    self.refreshed = True
+
+        processed: Set[str] = {id for id in ids if known.find(scraper_id, id) is not None}
+
+        # jobs that the filter cannot rule out are looked up together
+        maybe = list({id for id in ids if id not in processed and known.maybe(id)})
+        if len(maybe) > 0:
+            processed.update(await known.lookup(self.prisma, maybe))
+
+        unseen = [value for value, id in zip(values, ids) if id not in processed]
+
+        omega.context.existing += len(values) - len(unseen)
+        omega.item[self.target_field] = unseen
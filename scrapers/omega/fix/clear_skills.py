@@ -12,6 +12,9 @@ class CustomConfig(OmegaActionConfig):
 class ClearSkills(OmegaAction[CustomConfig]):
     uid = "jobiq.fix.clear_skills"
 
+    def fields_read(self):
+        return [*(super().fields_read() or []), "jobId"]
+
     async def _execute(self, omega: OmegaItem):
 
         prisma = await connect()
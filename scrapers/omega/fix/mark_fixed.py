@@ -15,6 +15,9 @@ class CustomConfig(OmegaActionConfig):
 class MarkFixed(OmegaAction[CustomConfig]):
     uid = "jobiq.fix.mark_fixed"
 
+    def fields_read(self):
+        return [*(super().fields_read() or []), "jobId"]
+
     async def _execute(self, omega: OmegaItem):
 
         prisma = await connect()
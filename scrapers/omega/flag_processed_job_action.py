@@ -1,9 +1,11 @@
+import asyncio
 import json
 from typing import Any
 
 from api.db import connect
+from libs.profiler import waiting
 from scrapers.helpers import current_date
-from scrapers.omega.action import OmegaAction, OmegaItem
+from scrapers.omega.action import OmegaAction, OmegaItem, field_name
 from scrapers.omega.exception import OmegaException
 
 class FlagProcessedJob(OmegaAction[Any]):
@@ -13,6 +15,19 @@ class FlagProcessedJob(OmegaAction[Any]):
         self.prisma = await connect()
         self.selector = self.config["selector"] if "selector" in self.config else None
         self.source_field = self.config["source_field"] if "source_field" in self.config else None
+        # the index of the known jobs is brought up to date once per run, by the first record
+        self.refreshed = False
+        self.refreshing = asyncio.Lock()
+
+    def fields_read(self):
+        # without a source field the whole record is stored
+        if "source_field" not in self.config:
+            return None
+        return [field_name(self.config["selector"]) if "selector" in self.config else "jobId",
+                field_name(self.config["source_field"])]
+
+    def fields_written(self):
+        return ["processedJobId"]
 
     async def _execute(self, omega: OmegaItem):
 
@@ -21,13 +36,24 @@ class FlagProcessedJob(OmegaAction[Any]):
         else:
             id = omega.item["jobId"]
 
-        existing = await self.prisma.processedjob.find_first(where={
-            "jobId": str(id)
-        })
+        known = omega.app.known_jobs
+        scraper_id = omega.context.scraper.id
+
+        if not self.refreshed:
+            async with self.refreshing:
+                if not self.refreshed:
+                    await known.refresh(self.prisma, scraper_id)
+                    self.refreshed = True
+
+        # most listing items were processed by this scraper before, new jobs are not in the filter
+        existing_id = known.find(scraper_id, str(id))
+        if existing_id is None and known.maybe(str(id)):
+            existing = await known.lookup(self.prisma, [str(id)])
+            existing_id = existing[str(id)] if str(id) in existing else None
 
-        if (existing is not None):
+        if existing_id is not None:
             omega.context.existing += 1
-            omega.item["processedJobId"] = existing.id
+            omega.item["processedJobId"] = existing_id
             raise OmegaException(
                 "info", f"Job {id} has already been processed")
 
@@ -38,15 +64,16 @@ class FlagProcessedJob(OmegaAction[Any]):
         #     raise OmegaException(
         #         "info", f"Job {id} has already been processed")
 
-        if existing is None:
-            existing = await self.prisma.processedjob.create(data={
+        with waiting("db"):
+            created = await self.prisma.processedjob.create(data={
                 "data": json.dumps(
                     omega.resolve(
-                        self.source_field) if self.source_field is not None else omega.item
+                        self.source_field) if self.source_field is not None else omega.flatten()
                 ),
                 "date": current_date(),
-                "scraper": omega.context.scraper.id,
+                "scraper": scraper_id,
                 "jobId": str(id)
             })
+        known.add(scraper_id, str(id), created.id)
 
-        omega.item["processedJobId"] = existing.id
+        omega.item["processedJobId"] = created.id
@@ -2,7 +2,9 @@ from typing import Any, Dict
 
 from typing_extensions import NotRequired
 
-from scrapers.helpers import fetch_graphql
+from libs.http_cache import CacheOptions
+from libs.rate_limit import RateLimits
+from scrapers.helpers import Template, compile_template
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 
@@ -13,16 +15,25 @@ class CustomConfig(OmegaActionConfig):
     query_name: str
     target_field: NotRequired[str]
     variables: Dict[str, Any]
+    timeout: NotRequired[float]
+    cache_ttl: NotRequired[float]
 
 
 class GraphqlRequest(OmegaAction[CustomConfig]):
     uid = "jobiq.request.graphql"
 
     async def init(self):
-        self.url = self.config["url"]
+        self.url = compile_template(self.config["url"])
         self.query = self.config["query"]
-        self.variables = self.config["variables"]
+        self.variables = {
+            key: compile_template(value) if isinstance(value, str) else value
+            for key, value in self.config["variables"].items()
+        }
         self.target_field = self.config["target_field"] if "target_field" in self.config else None
+        self.timeout = self.config["timeout"] if "timeout" in self.config else None
+        self.rate_limits = RateLimits(
+            self.shared_config["rate_limits"] if "rate_limits" in self.shared_config else None)
+        self.cache = CacheOptions.create(self.shared_config, self.config)
 
     async def _execute(self, omega: OmegaItem):
         # process url
@@ -31,9 +42,10 @@ class GraphqlRequest(OmegaAction[CustomConfig]):
         # parse variables and add values from the item
         parsed_variables = {}
         for key, value in self.variables.items():
-            parsed_variables[key] = omega.parse_string(value)
+            parsed_variables[key] = omega.parse_string(
+                value) if isinstance(value, Template) else value
 
-        data = fetch_graphql(url, self.query, parsed_variables)
+        data = await omega.app.http.fetch_graphql(url, self.query, parsed_variables, self.timeout, self.rate_limits, self.cache)
 
         omega.url = url
         omega.source = data
@@ -41,7 +53,4 @@ class GraphqlRequest(OmegaAction[CustomConfig]):
         if self.target_field is not None:
             omega.item[self.target_field] = next(iter(data["data"].values()))
         else:
-            omega.item = {
-                **omega.item,
-                **data["data"][self.config["query_name"]]
-            }
+            omega.item.update(data["data"][self.config["query_name"]])
@@ -1,3 +1,4 @@
+from scrapers.helpers import compile_template
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 
@@ -11,12 +12,13 @@ class LogAction(OmegaAction[CustomConfig]):
     uid = "jobiq.log"
 
     async def init(self):
-        pass
+        self.text = compile_template(
+            self.config["text"]) if "text" in self.config else None
 
     async def _execute(self, omega: OmegaItem):
         # process url
         print(
-            (omega.parse_string(self.config["text"]) if "text" in self.config else "") +
+            (omega.parse_string(self.text) if self.text is not None else "") +
             (omega.resolve(self.config["field"])
              if "field" in self.config else "")
         )
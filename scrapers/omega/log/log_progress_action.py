@@ -1,3 +1,4 @@
+from scrapers.helpers import compile_template
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 
@@ -11,10 +12,10 @@ class LogProgressAction(OmegaAction[CustomConfig]):
     uid = "jobiq.log_progress"
 
     async def init(self):
-        pass
+        self.message = compile_template(self.config["message"])
 
     async def _execute(self, omega: OmegaItem):
         if "increase_current" in self.config:
             omega.context.current_record += self.config["increase_current"]
 
-        omega.context.log_progress(omega.parse_string(self.config["message"]))
+        omega.context.log_progress(omega.parse_string(self.message))
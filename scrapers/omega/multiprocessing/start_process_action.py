@@ -22,7 +22,7 @@ class StartProcess(OmegaAction[CustomConfig]):
             raise Exception("This action needs to have children")
 
         item: QueueProcessItem = {
-            "item": omega.item,
+            "item": omega.flatten(),
             "slot": 0,
             "scraper_id": omega.context.scraper.id,
             "run_id": runId,
@@ -1,10 +1,11 @@
-from typing import List, TypedDict
+from typing import Dict, List, TypedDict
 from prisma import Prisma
-from prisma.models import Skill, JobRole
 from prisma.types import JobSkillCreateWithoutRelationsInput, JobRolesCreateWithoutRelationsInput
 
 from api.gemini import generate_job_skills
 from api.db import connect
+from api.taxonomy import TaxonomyIndex
+from libs.profiler import waiting
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 from scrapers.omega.exception import OmegaException
@@ -38,113 +39,22 @@ class ParseSkills(OmegaAction[CustomConfig]):
         self.target_field = self.config["target_field"]
         self.min_skills = self.config["min_skills"]
 
-    async def check_create_role(self, prisma: Prisma, jobs: JobInfo) -> JobRole:
-        # check create industry
-        industry = await prisma.industry.find_first(where={
-            "OR": [
-                { "name": jobs["industry"] },
-                { "alternativeNames": { "has": jobs["industry"] } }
-            ]
-        })
-        if industry is None:
-            industry = await prisma.industry.create({
-                "name": jobs["industry"]
-            })
-
-        # check create cluster
-        cluster = await prisma.jobrole.find_first(where={
-            "OR": [
-                { "name": jobs["cluster"] },
-                { "alternativeNames": { "has": jobs["cluster"] } }
-            ], 
-            "familyId": FAMILY
-        })
-        if cluster is None:
-            cluster = await prisma.jobrole.create({
-                "name": jobs["cluster"],
-                "familyId": FAMILY,
-                "industryId": industry.id
-            })
-
-        # find this role
-        role = await prisma.jobrole.find_first(where={
-            "OR": [
-                { "name": { "in": jobs["titles"] } },
-                { "alternativeNames": { "has_some": jobs["titles"] } }
-            ],
-            "parentId": cluster.id,
-            "industryId": industry.id
-        })
-
-        # if role is found we merge the alternative names
-        if role is None:
-            role = await prisma.jobrole.create({
-                "familyId": FAMILY,
-                "name": jobs["titles"][0],
-                "alternativeNames": jobs["titles"][1:],
-                "parentId": cluster.id,
-                "industryId":  industry.id
-            })    
-        else:
-            alternative_names = [*role.alternativeNames]
-            for title in jobs["titles"]:
-                if title != role.name and title not in alternative_names:
-                    alternative_names.append(title)
-            
-            if len(alternative_names) != len(role.alternativeNames):
-                await prisma.jobrole.update(
-                    where={"id_familyId": {
-                        "id": role.id, "familyId": FAMILY
-                    }},
-                    data={"alternativeNames": alternative_names}
-                )
-
-        return role
-
-    async def check_create_skills(self, prisma: Prisma, skills: List[SkillInfo], skill_type: str, clusters: List[Skill]) -> List[Skill]:
-        existing_skills = await prisma.skill.find_many(
-            where={
-                "OR": [
-                    { "name": { "in": [x["skill"] for x in skills] } },
-                    { "alternativeNames": { "has_some": [x["skill"] for x in skills] } }
-                ],
-                
-                "type": skill_type,
-                "familyId": FAMILY
-            }
-        )
-        # Find missing competencies
-        existing_skill_names = {name for c in existing_skills for name in [c.name, *(c.alternativeNames or [])]}   
-        all_competency_names = {x["skill"] for x in skills}
-        missing_skills = all_competency_names - existing_skill_names
-
-        # Insert missing competencies
-        new_skills: List[Skill] = []
-        for skill in [x for x in skills if x["skill"] in missing_skills]:
-            # Find the cluster in clusters by name
-            cluster = next((c for c in clusters if c.name == skill["cluster"]), None)
-            competency = await prisma.skill.create(
-                {
-                    "name": skill["skill"],
-                    "familyId": FAMILY,
-                    "parentSkillId": cluster.id if cluster else None,
-                    "type": skill_type,
-                }
-            )
-            new_skills.append(competency)
-
-        # Create a new array with all competencies (existing + newly inserted)
-        return list(existing_skills) + new_skills
-    
-    async def check_create_clusters_and_skills(self, prisma: Prisma, skills: List[SkillInfo], skill_type: str) -> List[Skill]:
-        unique_clusters = list({x["cluster"] for x in skills})
-        clusters = await self.check_create_skills(
-            prisma,
-            [{"skill": cluster, "cluster": ""} for cluster in unique_clusters],
-            "cluster",
-            []
-        )
-        return await self.check_create_skills(prisma, skills, skill_type, clusters)
+    async def check_create_role(self, prisma: Prisma, taxonomy: TaxonomyIndex, jobs: JobInfo) -> int:
+        industry_id = await taxonomy.industry(prisma, jobs["industry"])
+        cluster_id = await taxonomy.cluster(prisma, jobs["cluster"], industry_id)
+        return await taxonomy.role(prisma, jobs["titles"], cluster_id, industry_id)
+
+    async def check_create_clusters_and_skills(self, prisma: Prisma, taxonomy: TaxonomyIndex, skills: List[SkillInfo], skill_type: str) -> List[int]:
+        clusters: Dict[str, int] = {}
+        ids: List[int] = []
+        for skill in skills:
+            if skill["cluster"] not in clusters:
+                clusters[skill["cluster"]] = await taxonomy.skill(prisma, "cluster", skill["cluster"], None)
+
+            id = await taxonomy.skill(prisma, skill_type, skill["skill"], clusters[skill["cluster"]])
+            if id not in ids:
+                ids.append(id)
+        return ids
 
     async def _execute(self, omega: OmegaItem):
         item = omega.item
@@ -154,19 +64,24 @@ class ParseSkills(OmegaAction[CustomConfig]):
         description = item[self.description_field] if self.description_field in item else ""
 
         # for each framework add those skills
-        result = generate_job_skills(
-            title,
-            description
-        )
+        with waiting("gemini"):
+            result = generate_job_skills(
+                title,
+                description
+            )
 
         if result is None:
             raise OmegaException(
                 "error", f"No response when generating skills for '{title}'")
 
         prisma = await connect()
+        # resolves the names locally, only new ones are written
+        taxonomy = omega.app.taxonomy(FAMILY)
+        await taxonomy.load(prisma)
 
-        competencies: List[Skill] = await self.check_create_clusters_and_skills(
+        competencies = await self.check_create_clusters_and_skills(
             prisma,
+            taxonomy,
             [{ 
                 "cluster": x["cluster"],
                 "skill": x["competency"]
@@ -176,6 +91,7 @@ class ParseSkills(OmegaAction[CustomConfig]):
         
         technologies = await self.check_create_clusters_and_skills(
             prisma,
+            taxonomy,
             [{ 
                 "cluster": x["cluster"],
                 "skill": x["tool"]
@@ -185,6 +101,7 @@ class ParseSkills(OmegaAction[CustomConfig]):
         
         tasks = await self.check_create_clusters_and_skills(
             prisma,
+            taxonomy,
             [{ 
                 "cluster": x["cluster"],
                 "skill": x["task"]
@@ -192,19 +109,20 @@ class ParseSkills(OmegaAction[CustomConfig]):
             "task"
         ) 
 
-        for skill in competencies + technologies + tasks:
+        for skill_id in competencies + technologies + tasks:
             skill_mappings.append(
                 {
                     "skillFamilyId": FAMILY,
-                    "skillId": skill.id,
+                    "skillId": skill_id,
                 }
             )
         
 
         # for core_competency in result["core_competencies"]:
             
-        role = await self.check_create_role(
+        role_id = await self.check_create_role(
             prisma,
+            taxonomy,
             {
                 "titles": result["job_titles"],
                 "cluster": result["job_cluster"],
@@ -213,7 +131,7 @@ class ParseSkills(OmegaAction[CustomConfig]):
         )
 
         jobRole: JobRolesCreateWithoutRelationsInput = {
-            "roleId": role.id,
+            "roleId": role_id,
             "familyId": FAMILY
         }
 
@@ -17,6 +17,7 @@ from scrapers.omega.extraction.extract_soup_groups_action import \
 from scrapers.omega.fix.clear_skills import ClearSkills
 from scrapers.omega.fix.list_errors import ListErrorAction
 from scrapers.omega.fix.mark_fixed import MarkFixed
+from scrapers.omega.filter_processed_jobs_action import FilterProcessedJobs
 from scrapers.omega.flag_processed_job_action import FlagProcessedJob
 from scrapers.omega.graphql_query_action import GraphqlRequest
 from scrapers.omega.log.log_action import LogAction
@@ -27,6 +28,8 @@ from scrapers.omega.multiprocessing.start_process_action import StartProcess
 from scrapers.omega.parse_roles_action import ParseRoles
 from scrapers.omega.parse_skills_action import ParseSkills
 from scrapers.omega.requests.request_json_action import RequestJsonAction
+from scrapers.omega.requests.request_json_stream_action import \
+    RequestJsonStream
 from scrapers.omega.requests.request_selenium_soup_action import \
     SeleniumRequest
 from scrapers.omega.requests.request_soup_action import RequestSoup
@@ -40,6 +43,7 @@ class OmegaActionsRepository:
         self.actions: Dict[str, Type[OmegaAction[Any]]] = {
             SaveJob.uid: SaveJob,
             FlagProcessedJob.uid: FlagProcessedJob,
+            FilterProcessedJobs.uid: FilterProcessedJobs,
             # AI Parsers
             ParseRoles.uid: ParseRoles,
             ParseSkills.uid: ParseSkills,
@@ -62,6 +66,7 @@ class OmegaActionsRepository:
             ExtractSoupGroupsAction.uid: ExtractSoupGroupsAction,
             ExtractJsonFieldsAction.uid: ExtractJsonFieldsAction,
             RequestJsonAction.uid: RequestJsonAction, 
+            RequestJsonStream.uid: RequestJsonStream,
             # selenium
             SeleniumClick.uid: SeleniumClick,
             CloudflareHuman.uid: CloudflareHuman,
@@ -1,8 +1,8 @@
-import time
-
 from typing_extensions import NotRequired
 
-from scrapers.helpers import fetch_json
+from libs.http_cache import CacheOptions
+from libs.rate_limit import RateLimits
+from scrapers.helpers import compile_template
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 
@@ -11,19 +11,26 @@ class CustomConfig(OmegaActionConfig):
     url: str
     target_field: str
     url_field: NotRequired[str]
+    timeout: NotRequired[float]
+    cache_ttl: NotRequired[float]
 
 
 class RequestJsonAction(OmegaAction[CustomConfig]):
     uid = "jobiq.request.json"
 
     async def init(self):
-        self.url = self.config["url"]
+        self.url = compile_template(self.config["url"])
+        self.timeout = self.config["timeout"] if "timeout" in self.config else None
+        # one request per second in each worker unless the spec sets the rate for this host
+        self.rate_limits = RateLimits(
+            self.shared_config["rate_limits"] if "rate_limits" in self.shared_config else None, 1)
+        self.cache = CacheOptions.create(self.shared_config, self.config)
 
     async def _execute(self, omega: OmegaItem):
         # process url
         url = omega.parse_string(self.url)
 
-        data = fetch_json(url)
+        data = await omega.app.http.fetch_json(url, self.timeout, self.rate_limits, self.cache)
 
         omega.url = url
         omega.source = data
@@ -31,5 +38,3 @@ class RequestJsonAction(OmegaAction[CustomConfig]):
 
         if "url_field" in self.config:
             omega.item[self.config["url_field"]] = url
-
-        time.sleep(1)
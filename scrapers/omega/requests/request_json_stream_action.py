@@ -0,0 +1,59 @@
+from contextlib import aclosing
+from typing import Any, AsyncIterator
+
+from typing_extensions import NotRequired
+
+from libs.rate_limit import RateLimits
+from scrapers.helpers import compile_template
+from scrapers.omega.action import OmegaAction, OmegaItem
+from scrapers.omega.config import OmegaActionConfig
+
+
+class CustomConfig(OmegaActionConfig):
+    url: str
+    # array of the response, e.g. `results` or `data.jobs`, empty for an array at the root
+    path: str
+    target_field: str
+    index_field: NotRequired[str]
+    url_field: NotRequired[str]
+    timeout: NotRequired[float]
+
+
+class RequestJsonStream(OmegaAction[CustomConfig]):
+    """
+    Runs the children for each element of an array of a JSON response while it is
+    downloaded, for feeds too large to keep in the item.
+    """
+    uid = "jobiq.request.json_stream"
+
+    async def init(self):
+        self.url = compile_template(self.config["url"])
+        self.path = self.config["path"] if "path" in self.config else ""
+        self.timeout = self.config["timeout"] if "timeout" in self.config else None
+        # one request per second in each worker unless the spec sets the rate for this host
+        self.rate_limits = RateLimits(
+            self.shared_config["rate_limits"] if "rate_limits" in self.shared_config else None, 1)
+        self.concurrency = self.config["concurrency"] if "concurrency" in self.config else 1
+
+        await super().init_children()
+
+    async def _execute(self, omega: OmegaItem):
+        url = omega.parse_string(self.url)
+
+        omega.url = url
+        if "url_field" in self.config:
+            omega.item[self.config["url_field"]] = url
+
+        async def items(elements: AsyncIterator[Any]):
+            i = 0
+            async for value in elements:
+                new_item = omega.clone()
+                if "index_field" in self.config:
+                    new_item.item[self.config["index_field"]] = i
+                new_item.item[self.config["target_field"]] = value
+                i += 1
+                yield new_item
+
+        # a failing child closes the response
+        async with aclosing(omega.app.http.stream_json(url, self.path, self.timeout, self.rate_limits)) as elements:
+            await self.execute_children_stream(items(elements), self.concurrency)
@@ -1,6 +1,7 @@
-from bs4 import BeautifulSoup
+from typing_extensions import NotRequired
 
-from scrapers.helpers import Souped
+from libs.rate_limit import RateLimits
+from scrapers.helpers import SelectorFilter, compile_template, html_parser
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 
@@ -9,24 +10,46 @@ class CustomConfig(OmegaActionConfig):
     url: str
     wait_css: str
     wait_xpath: str
+    parser: NotRequired[str]
 
 
 class SeleniumRequest(OmegaAction[CustomConfig]):
     uid = "jobiq.request.selenium.soup"
 
     async def init(self):
+        self.url = compile_template(self.config["url"])
+        self.rate_limits = RateLimits(
+            self.shared_config["rate_limits"] if "rate_limits" in self.shared_config else None)
         self.wait_css = self.config["wait_css"] if "wait_css" in self.config else None
         self.wait_xpath = self.config["wait_xpath"] if "wait_xpath" in self.config else None
+        self.parser = html_parser(self.shared_config, self.config)
+        self.parse_only: SelectorFilter | None = None
+
+    def restrict_parsing(self, parse_only: SelectorFilter):
+        self.parse_only = parse_only
 
     async def _execute(self, omega: OmegaItem):
         # process url
-        url = omega.parse_string(self.config["url"])
+        url = omega.parse_string(self.url)
+
+        async def load():
+            # the browser is not used by other records between our turn and reading the page
+            async with omega.app.browser:
+                # wait for our turn on this host
+                host = self.rate_limits.host(url)
+                interval = self.rate_limits.interval(host)
+                if interval is not None:
+                    await omega.app.rate_limiter.acquire(host, interval)
+
+                source = omega.app.selenium.load_page(url, self.wait_css, self.wait_xpath)
+                return {"source": source, "url": omega.app.selenium.driver.current_url}
 
-        data = omega.app.selenium.load_page(url, self.wait_css, self.wait_xpath)
+        page = await omega.app.archived(self.uid, [url, self.wait_css, self.wait_xpath], load)
+        data = page["source"]
 
         omega.url = url
-        omega.current_url = omega.app.selenium.driver.current_url
+        omega.current_url = page["url"]
         
         omega.source = data
-        omega.soup = Souped(BeautifulSoup(data, "html.parser"))
+        omega.soup = omega.app.parse(data, self.parser, self.parse_only)
 
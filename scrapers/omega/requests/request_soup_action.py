@@ -1,6 +1,8 @@
-from bs4 import BeautifulSoup
+from typing_extensions import NotRequired
 
-from scrapers.helpers import Souped, fetch_url
+from libs.http_cache import CacheOptions
+from libs.rate_limit import RateLimits
+from scrapers.helpers import SelectorFilter, compile_template, html_parser
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 
@@ -9,21 +11,33 @@ class CustomConfig(OmegaActionConfig):
     url: str
     query: str
     variables: str
+    timeout: NotRequired[float]
+    cache_ttl: NotRequired[float]
+    parser: NotRequired[str]
 
 
 class RequestSoup(OmegaAction[CustomConfig]):
     uid = "jobiq.request.soup"
 
     async def init(self):
-        self.url = self.config["url"]
+        self.url = compile_template(self.config["url"])
+        self.timeout = self.config["timeout"] if "timeout" in self.config else None
+        self.rate_limits = RateLimits(
+            self.shared_config["rate_limits"] if "rate_limits" in self.shared_config else None)
+        self.cache = CacheOptions.create(self.shared_config, self.config)
+        self.parser = html_parser(self.shared_config, self.config)
+        self.parse_only: SelectorFilter | None = None
+
+    def restrict_parsing(self, parse_only: SelectorFilter):
+        self.parse_only = parse_only
 
     async def _execute(self, omega: OmegaItem):
         # process url
         url = omega.parse_string(self.url)
 
-        data = fetch_url(url)
+        data = await omega.app.http.fetch_text(url, self.timeout, self.rate_limits, self.cache)
 
         omega.url = url
         omega.current_url = url
         omega.source = data
-        omega.soup = Souped(BeautifulSoup(data, "html.parser"))
+        omega.soup = omega.app.parse(data, self.parser, self.parse_only)
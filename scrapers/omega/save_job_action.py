@@ -1,34 +1,42 @@
 from typing import Any
 
+from prisma.enums import JobStatus, SalaryPeriod
+
 from api.db import connect
+from api.jobs import create_job
 from scrapers.helpers import current_date
 from scrapers.omega.action import OmegaAction, OmegaItem
-from prisma.enums import  SalaryPeriod
+
+# fields of the record stored with the job
+JOB_FIELDS = [
+    "employer", "city", "country", "createdDate", "expiryDate", "logo", "intermediary", "jobId",
+    "postCode", "maxAnnualSalary", "minMonthlySalary", "maxMonthlySalary", "minHourlySalary",
+    "maxHourlySalary", "salaryCurrency", "education", "minExperience", "region", "state",
+    "description", "text", "title", "Skills"
+]
 
 class SaveJob(OmegaAction[Any]):
     uid = "jobiq.save_job"
 
     async def init(self):
         self.prisma = await connect()
+        # jobs of the records of the process are written together when the spec sets a batch size
+        self.batch_size = self.config["batch_size"] if "batch_size" in self.config else 1
+        self.batch_interval = self.config["batch_interval"] if "batch_interval" in self.config else 0.1
+
+    def fields_read(self):
+        return [*(super().fields_read() or []), *JOB_FIELDS]
 
     async def _execute(self, omega: OmegaItem):
         item = omega.item
 
-        if "employer" in item:
-            employer = await self.prisma.employer.find_first(
-                where={"name": item["employer"]} 
-            )
-            if employer is None:
-                employer = await self.prisma.employer.create(data={
-                    "name": item["employer"],
-                    "webId": "",
-                    "scraperId": omega.context.scraper.id,
-                })
-            employer_id = employer.id
-        else:
-            employer_id = 0
+        employer = {
+            "name": item["employer"],
+            "webId": "",
+            "scraperId": omega.context.scraper.id,
+        } if "employer" in item else None
 
-        await self.prisma.job.create(data={
+        data = {
             "city": item["city"] if "city" in item else None,
             "country": item["country"] if "country" in item else None,
             "createdDate": item["createdDate"] if "createdDate" in item else None,
@@ -36,7 +44,6 @@ class SaveJob(OmegaAction[Any]):
             # "domainId": None,
             "expiryDate": item["expiryDate"] if "expiryDate" in item else None,
             "logo": item["logo"] if "logo" in item and item["logo"] != None else "",
-            "employerId": employer_id,
             "intermediary": item["intermediary"] if "intermediary" in item else None,
             "industryId": 0,
             "jobId": item["jobId"],
@@ -69,6 +76,25 @@ class SaveJob(OmegaAction[Any]):
             "Roles": {"create": item["Skills"]["Role"]},
             "scraperId": omega.context.scraper.id,
             "scrapedDate": current_date()
-        })
+        }
+
+        # init has no access to the app of the run, the employers are loaded with the first job
+        await omega.app.employers.warm(self.prisma, omega.context.scraper.id)
+
+        if self.batch_size > 1:
+            # the record does not wait for the write, it is reported if its job fails
+            batch = omega.app.jobs.get(self.batch_size, self.batch_interval)
+            batch.save(employer, data, lambda e: self.failed(omega, e))
+        else:
+            await create_job(self.prisma, omega.app.employers, employer, data)
 
         omega.context.succeeded += 1
+
+    async def failed(self, omega: OmegaItem, e: Exception):
+        # counted in the run when the record has not finished yet, its processed job keeps the error
+        message = f"Could not save the job '{e}' at ({omega.url})"
+        print(f"NOT Ω {message}")
+        omega.context.errors.append(message)
+        omega.context.succeeded -= 1
+        omega.context.failed += 1
+        await self.update_processed_job(omega, JobStatus.Error, message)
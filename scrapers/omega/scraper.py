@@ -8,9 +8,13 @@ if TYPE_CHECKING:
     from scrapers.omega.action import AppContext
     from scrapers.omega.config import OmegaConfig
 
+import os
+
 import yaml
 from prisma.enums import ScraperRunStatus
 
+from libs.tracing import Tracer
+
 from scrapers.omega.action import OmegaContext, OmegaItem
 from scrapers.omega.exception import OmegaAbort, OmegaException
 from scrapers.omega.repository import repository
@@ -68,11 +72,23 @@ class OmegaScraper():
             item.run.id if item.run is not None else None,
         )
 
+        # timeline of the run, the `trace` run property is the directory of the trace files
+        properties = item.info.properties
+        if "trace" in properties:
+            self.trace_directory = properties["trace"]
+            self.context.profile.tracer = Tracer(
+                f"worker {properties['process_id']}" if item.sub_process else "manager",
+                {
+                    "run": self.context.runId,
+                    "slot": properties["slot_id"] if "slot_id" in properties else None
+                }
+            )
+
         omega = OmegaItem(self.context, app, item.info.properties)
         wrapper = WrapperAction(
             self.config,
             self.config["properties"] if "properties" in self.config else {
-            }, repository.actions
+            }, repository.actions, item.sub_process
         )
 
         try:
@@ -105,7 +121,15 @@ class OmegaScraper():
         self.context.running = False
 
     def create_report(self) -> Any | None:
-        return self.context.reports
+        return {**self.context.reports, "profile": self.context.profile.summary()}
+
+    def create_profile(self) -> Any:
+        return self.context.profile.summary()
+
+    def write_trace(self):
+        tracer = self.context.profile.tracer
+        if tracer is not None:
+            tracer.write(os.path.join(self.trace_directory, f"run-{self.context.runId}.json"))
 
     # def create_mail(self) -> str | None:
     #     return f"""
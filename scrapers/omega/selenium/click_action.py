@@ -1,9 +1,9 @@
-from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
+from typing_extensions import NotRequired
 
-from scrapers.helpers import Souped
+from scrapers.helpers import SelectorFilter, html_parser
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 
@@ -12,16 +12,23 @@ class CustomConfig(OmegaActionConfig):
     selector: str
     optional: bool
     wait_css: str
+    parser: NotRequired[str]
 
 
 class SeleniumClick(OmegaAction[CustomConfig]):
     uid = "jobiq.selenium.click"
+    reads_browser_page = True
 
     async def init(self):
         self.selector = self.config["selector"]
         self.optional = self.config["optional"] if "optional" in self.config and self.config["optional"] == True else False
+        self.parser = html_parser(self.shared_config, self.config)
+        self.parse_only: SelectorFilter | None = None
 
-    async def _execute(self, omega: OmegaItem):
+    def restrict_parsing(self, parse_only: SelectorFilter):
+        self.parse_only = parse_only
+
+    async def click(self, omega: OmegaItem):
         try:
             element = omega.app.selenium.driver.find_element(
                 By.CSS_SELECTOR, self.selector
@@ -45,6 +52,11 @@ class SeleniumClick(OmegaAction[CustomConfig]):
                 raise Exception(
                     "error", f"Wait element not found: {self.config['wait_css']}")
 
-        data = omega.app.selenium.driver.page_source
+        return {"source": omega.app.selenium.driver.page_source}
+
+    async def _execute(self, omega: OmegaItem):
+        page = await omega.app.archived(self.uid, [omega.url, self.selector], lambda: self.click(omega))
+
+        data = page["source"]
         omega.source = data
-        omega.soup = Souped(BeautifulSoup(data, "html.parser"))
+        omega.soup = omega.app.parse(data, self.parser, self.parse_only)
@@ -1,13 +1,14 @@
+import asyncio
 import random
-import time
 
-from bs4 import BeautifulSoup
 from selenium.webdriver import Chrome
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
+from typing_extensions import NotRequired
 
-from scrapers.helpers import Souped
+from libs.rate_limit import RateLimits
+from scrapers.helpers import DomainIndex, SelectorFilter, html_parser
 from scrapers.omega.action import OmegaAction, OmegaItem
 from scrapers.omega.config import OmegaActionConfig
 from scrapers.omega.exception import OmegaException
@@ -16,67 +17,90 @@ from scrapers.omega.exception import OmegaException
 class CustomConfig(OmegaActionConfig):
     timeout: float
     verify_element: str
+    parser: NotRequired[str]
 
 
 class CloudflareHuman(OmegaAction[CustomConfig]):
     uid = "jobiq.selenium.cloudflare_human"
+    # the page may have been loaded by an earlier action
+    reads_browser_page = True
 
     def verify_success(self, driver: Chrome, timeout: float | None = None):
         if timeout is None:
             timeout = self.config["timeout"] if "timeout" in self.config and self.config["timeout"] > 0 else 8
 
-        # got throug each key of self.shared_config["domains"] and see if matches current driver ur
-        # if not, then we are not on the right page
-        found = False
+        # find the domain config of the current driver url,
+        # if there is none, then we are not on the right page
         url = driver.current_url
         print(url)
-        for domain in self.shared_config["domains"]:
-            if domain in url:
-                found = True
+        domain = self.domains.find(url) if self.domains is not None else None
 
-                # it may not be available
-                na_text = self.shared_config["domains"][domain]["config"]["na"]
-                if na_text:
-                    try:
-                        driver.find_element(By.XPATH, f"//*[contains(text(), '{na_text}')]")
-                        raise OmegaException("error", "404 - Job No Longer available" )
-                    except Exception:
-                        pass
-
-                # check if we are on the right page
-                
-                for key in self.shared_config["domains"][domain]:
-                    if key != "config":
-                        WebDriverWait(driver, timeout).until(
-                            EC.presence_of_element_located(
-                                (By.CSS_SELECTOR, self.shared_config["domains"][domain][key]))
-                        )
-
-                return
-        
-        if not found:
+        if domain is None:
             raise OmegaException(
                 "error", f"Could not bypass Cloudflare: {driver.current_url} not in {self.shared_config['domains']}")
 
+        # it may not be available
+        na_text = self.shared_config["domains"][domain]["config"]["na"]
+        if na_text:
+            try:
+                driver.find_element(By.XPATH, f"//*[contains(text(), '{na_text}')]")
+                raise OmegaException("error", "404 - Job No Longer available" )
+            except Exception:
+                pass
+
+        # check if we are on the right page
+        for key in self.shared_config["domains"][domain]:
+            if key != "config":
+                WebDriverWait(driver, timeout).until(
+                    EC.presence_of_element_located(
+                        (By.CSS_SELECTOR, self.shared_config["domains"][domain][key]))
+                )
+
     async def init(self):
         self.timeout = self.config["timeout"] if "timeout" in self.config and self.config["timeout"] > 0 else 8
-
-    def try_open_tab(self, omega: OmegaItem, sleep_before: float, sleep_after: float):
+        self.rate_limits = RateLimits(
+            self.shared_config["rate_limits"] if "rate_limits" in self.shared_config else None)
+        self.parser = html_parser(self.shared_config, self.config)
+        self.parse_only: SelectorFilter | None = None
+        self.domains = DomainIndex(self.shared_config["domains"]) if "domains" in self.shared_config else None
+
+    def restrict_parsing(self, parse_only: SelectorFilter):
+        self.parse_only = parse_only
+
+    async def wait_turn(self, omega: OmegaItem, url: str, sleep_before: float):
+        # hosts with a configured rate wait for their turn shared with other workers,
+        # others keep the random human-like pause
+        host = self.rate_limits.host(url)
+        interval = self.rate_limits.interval(host)
+        if interval is not None:
+            await omega.app.rate_limiter.acquire(host, interval)
+        else:
+            await asyncio.sleep(sleep_before)
+
+    async def try_open_tab(self, omega: OmegaItem, sleep_before: float, sleep_after: float):
         
         driver = omega.app.selenium.driver
-        time.sleep(sleep_before)
+        await self.wait_turn(omega, omega.url, sleep_before)
         driver.execute_script(
             f'''window.open("{omega.url}","_blank");''')  # open page in new tab
-        time.sleep(sleep_after)
+        await asyncio.sleep(sleep_after)
 
         # h = driver.window_handles[len(driver.window_handles) - 1]
         # driver.switch_to.window(window_name=h)
 
         self.verify_success(driver)
-        omega.soup = Souped(BeautifulSoup(
-            driver.page_source, "html.parser"))
+        return driver.page_source
 
     async def _execute(self, omega: OmegaItem):
+        async def load():
+            # other records wait until the tabs of this one are closed
+            async with omega.app.browser:
+                return await self.bypass(omega)
+
+        page = await omega.app.archived(self.uid, [omega.url], load)
+        omega.soup = omega.app.parse(page["source"], self.parser, self.parse_only)
+
+    async def bypass(self, omega: OmegaItem):
         driver = omega.app.selenium.driver
 
         sleep_before = 1 + random.random()
@@ -85,29 +109,28 @@ class CloudflareHuman(OmegaAction[CustomConfig]):
         # maybe we successfully loaded the page
         try:
             self.verify_success(driver, 0.5)
-            omega.soup = Souped(BeautifulSoup(
-                driver.page_source, "html.parser"))
+            source = driver.page_source
         except OmegaException as ex:
             raise ex
         except:
             try:
-                self.try_open_tab(omega, sleep_before, sleep_after)
+                source = await self.try_open_tab(omega, sleep_before, sleep_after)
             except:
-                time.sleep(sleep_before)
+                await self.wait_turn(omega, "https://www.google.com", sleep_before)
                 driver.execute_script(
                     f'''window.open("https://www.google.com","_blank");''')  # open page in new tab
-                time.sleep(sleep_after)
+                await asyncio.sleep(sleep_after)
                 try:
                     print("retry 1")
-                    self.try_open_tab(omega, sleep_before, sleep_after)
+                    source = await self.try_open_tab(omega, sleep_before, sleep_after)
                 except:
-                    time.sleep(sleep_before)
+                    await self.wait_turn(omega, "https://www.google.com?search=123", sleep_before)
                     driver.execute_script(
                         f'''window.open("https://www.google.com?search=123","_blank");''')  # open page in new tab
-                    time.sleep(sleep_after)
+                    await asyncio.sleep(sleep_after)
                     try:
                         print("retry 2")
-                        self.try_open_tab(omega, sleep_before, sleep_after)
+                        source = await self.try_open_tab(omega, sleep_before, sleep_after)
                     except:
                         raise OmegaException(
                             "error", f"Could not bypass Cloudflare")
@@ -122,6 +145,8 @@ class CloudflareHuman(OmegaAction[CustomConfig]):
                     driver.close()  # close first tab
                 driver.switch_to.window(window_name=handle)
 
+        return {"source": source}
+
             # # driver.tab_new(omega.url)
             # time.sleep(5)  # wait until page has loaded
             # # switch to first tab
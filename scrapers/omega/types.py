@@ -28,4 +28,6 @@ class QueueProcessResultItem(QueueProcessResultItemBase):
     warnings: List[str]
     info: List[str]
     reports: Dict[str, Any]
+    profile: Dict[str, Any]
+    trace: List[Dict[str, Any]]
     log: str
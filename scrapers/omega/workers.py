@@ -1,6 +1,10 @@
 import asyncio
 import multiprocessing as mp
+import queue
 from typing import List
+from libs.archive import Archive
+from libs.profiler import waiting
+from libs.rate_limit import HostRateLimiter
 from scrapers.omega.action import AppContext
 
 from scrapers.omega.types import (
@@ -24,7 +28,7 @@ class MultiProcessor(Generic[T, U]):
             # self.processes.append(process)
             process.start()
 
-    def __init__(self, num_processes: int | None = None, auto_start_processes: bool | None = False):
+    def __init__(self, num_processes: int | None = None, auto_start_processes: bool | None = False, archive: Archive | None = None):
         cpu_count = mp.cpu_count()
         
         self.num_processes = num_processes if num_processes is not None else cpu_count if cpu_count < 24 else 24
@@ -34,6 +38,11 @@ class MultiProcessor(Generic[T, U]):
         self.task_queue: 'mp.Queue[T | None]' = mp.Queue()
         self.result_queue: 'mp.Queue[U]' = mp.Queue()
 
+        # host budgets shared by all the workers
+        self.rate_limiter = HostRateLimiter()
+        # recording or replay of the run, each worker records to its own file
+        self.archive = archive
+
         if auto_start_processes:
             self.start_workers(self.num_processes)
     
@@ -45,13 +54,26 @@ class MultiProcessor(Generic[T, U]):
     ):
         print(f"🚀 Starting Worker Task {i}")
 
-        app_context = AppContext()
+        app_context = AppContext(self.rate_limiter, self.archive)
+
+        # one loop for all tasks of this worker keeps pooled connections alive between tasks
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
 
         while True:
-            task = task_queue.get()
+            try:
+                # a worker with pending work does it when no task comes in time
+                task = task_queue.get(timeout=self.idle_interval(app_context))
+            except queue.Empty:
+                loop.run_until_complete(self.idle(app_context))
+                continue
 
             if task is None:
+                loop.run_until_complete(self.idle(app_context))
+
                 # clean up the resources
+                loop.run_until_complete(app_context.close())
+                loop.close()
                 self.cleanup(app_context)
                 
                 # None is the signal to stop.
@@ -59,13 +81,20 @@ class MultiProcessor(Generic[T, U]):
                 break
 
             # run this task
-            item = asyncio.run(self.process_item(i, task, app_context))
+            item = loop.run_until_complete(self.process_item(i, task, app_context))
             # notify about the result
             result_queue.put(item)
             
 
     async def process_item(self, process: int, item: T, context: AppContext) -> U:
         raise Exception("Not implemented")
+
+    def idle_interval(self, context: AppContext) -> float | None:
+        # seconds without a task after which the worker is idle, None when it has nothing to do
+        return None
+
+    async def idle(self, context: AppContext) -> None:
+        pass
     
     def _process_result(self, result: U) -> None:
         self.slots[result["slot"]] = 0
@@ -118,7 +147,8 @@ class MultiProcessor(Generic[T, U]):
 
         if index == -1:
             # print("No slot available, waiting...")
-            result = self.result_queue.get()
+            with waiting("schedule"):
+                result = self.result_queue.get()
             self._process_result(result)
 
             if progress is not None:
@@ -156,7 +186,8 @@ class MultiProcessor(Generic[T, U]):
 
         # wait for all slots to finish
         while self.has_running_slots():
-            result = self.result_queue.get()
+            with waiting("workers"):
+                result = self.result_queue.get()
             self._process_result(result)
 
             # stop it immediately when requested 
@@ -1,13 +1,18 @@
-from typing import Any
+from typing import Any, List, Set, Tuple
 
-from scrapers.omega.action import ActionRepository, OmegaAction, OmegaItem
-from scrapers.omega.config import OmegaConfig
+from scrapers.helpers import SelectorFilter
+from scrapers.omega.action import ERROR_FIELDS, ActionRepository, OmegaAction, OmegaItem
+from scrapers.omega.config import OmegaConfig, get_id_from_name
+
+# unused fields already reported by this process
+reported: Set[Tuple[str, ...]] = set()
 
 
 class WrapperAction(OmegaAction[Any]):
     uid = "jobiq.wrapper"
 
-    def __init__(self, config: OmegaConfig, shared_config: Any, repository: ActionRepository):
+    def __init__(self, config: OmegaConfig, shared_config: Any, repository: ActionRepository, sub_process: bool = False):
+        self.sub_process = sub_process
         wrapped_config: Any = {
             "name": f"Wrapper (jobiq.wrapper)",
             "CHILDREN": config["actions"]
@@ -17,5 +22,65 @@ class WrapperAction(OmegaAction[Any]):
     async def init(self):
         await super().init_children()
 
+        if "restricted_parsing" in self.shared_config and self.shared_config["restricted_parsing"]:
+            self.restrict_parsing_of_tree()
+
+        # the tree of the workers is reported once by the manager, not for every record
+        self.unused_fields = self.find_unused_fields() if not self.sub_process else []
+        if len(self.unused_fields) > 0 and tuple(self.unused_fields) not in reported:
+            reported.add(tuple(self.unused_fields))
+            print(f"ℹ️  Fields that no action reads: {', '.join(self.unused_fields)}")
+
+    def find_unused_fields(self) -> List[str]:
+        # children that run in the workers are not initialised here, they are created only to read their config
+        actions: List[OmegaAction[Any]] = []
+        pending: List[OmegaAction[Any]] = [*(self.children or [])]
+        while len(pending) > 0:
+            action = pending.pop()
+            actions.append(action)
+            if action.children is not None:
+                pending.extend(action.children)
+            elif "CHILDREN" in action.config:
+                pending.extend(
+                    self.repository[get_id_from_name(x["name"])](x, self.shared_config, self.repository)
+                    for x in action.config["CHILDREN"] if get_id_from_name(x["name"]) in self.repository)
+
+        read: Set[str] = set(ERROR_FIELDS)
+        written: List[str] = []
+        for action in actions:
+            action_read = action.fields_read()
+            if action_read is None:
+                return []
+            read.update(action_read)
+            written.extend(x for x in action.fields_written() if x not in written)
+
+        return [x for x in written if x not in read]
+
+    def restrict_parsing_of_tree(self):
+        actions = self.descendants()
+
+        selectors: List[str] = []
+        for action in actions:
+            action_selectors = action.soup_selectors()
+            if action_selectors is None:
+                print(f"ℹ️  {action.name} uses unknown selectors, pages are parsed whole")
+                return
+            selectors.extend(action_selectors)
+
+        parse_only = SelectorFilter.create(selectors)
+        if parse_only is None:
+            print(f"ℹ️  Pages are parsed whole for selectors: {', '.join(selectors)}")
+            return
+
+        for action in actions:
+            action.restrict_parsing(parse_only)
+
     async def _execute(self, omega: OmegaItem):
-        await self.execute_children(omega)
+        if len(self.unused_fields) > 0:
+            omega.context.reports["unused_fields"] = self.unused_fields
+        try:
+            await self.execute_children(omega)
+        finally:
+            # the run ends with its jobs written, workers write theirs when they have no task
+            if not self.sub_process:
+                await omega.app.jobs.finish()
@@ -10,6 +10,7 @@ from prisma.enums import ScraperRunStatus
 from prisma.models import Scraper as ScraperDao
 
 from api.db import connect
+from libs.archive import Archive
 from scrapers.omega.action import AppContext
 from scrapers.omega.exception import OmegaAbort
 from scrapers.omega.scraper import OmegaScraper
@@ -58,12 +59,14 @@ class ScraperQueue:
     # queue = []
     items: List[ExecutionItem] = []
 
-    def __init__(self, num_workers: int | None = None):
+    def __init__(self, num_workers: int | None = None, archive: Archive | None = None):
         self.listeners: List[Callable[[ScraperEvents, Any], None]] = []
-        self.app_context = AppContext()
 
         if (num_workers != 0):
-            self.worker_manager = QueueProcessor(self, num_workers, False)
+            self.worker_manager = QueueProcessor(self, num_workers, False, archive)
+            self.app_context = AppContext(self.worker_manager.rate_limiter, archive)
+        else:
+            self.app_context = AppContext(archive=archive)
 
     def progress(self, progress_info: Any):
         self.fire(ScraperEvents.Progress, progress_info)
@@ -180,6 +183,7 @@ class ScraperQueue:
 
         if item.run is not None and item.sub_process == False:
             report = item.model.create_report()
+            item.model.write_trace()
             scraper_name = item.info.scraper.name
 
             mail_text = item.model.context.create_mail("")
@@ -281,8 +285,8 @@ class ScraperQueue:
 
 
 class QueueProcessor(MultiProcessor[QueueProcessItem, QueueProcessResultItem]):
-    def __init__(self, queue: ScraperQueue, num_processes: int | None = None, auto_start_processes: bool | None = False):
-        super().__init__(num_processes, auto_start_processes)
+    def __init__(self, queue: ScraperQueue, num_processes: int | None = None, auto_start_processes: bool | None = False, archive: Archive | None = None):
+        super().__init__(num_processes, auto_start_processes, archive)
         self.queue = queue
         self.selenium = None
 
@@ -291,6 +295,21 @@ class QueueProcessor(MultiProcessor[QueueProcessItem, QueueProcessResultItem]):
 
         context.cleanup()
 
+    def idle_interval(self, context: AppContext) -> float | None:
+        return context.jobs.idle_interval()
+
+    async def idle(self, context: AppContext) -> None:
+        # jobs saved by the last tasks, with a connection of their own
+        if context.jobs.idle_interval() is None:
+            return
+
+        prisma = await connect()
+        try:
+            await context.jobs.finish()
+        finally:
+            if prisma.is_connected():
+                await prisma.disconnect()
+
     async def process_item(self, process: int, item: QueueProcessItem, context: AppContext) -> QueueProcessResultItem:
         queue = ScraperQueue(0)
 
@@ -346,6 +365,10 @@ class QueueProcessor(MultiProcessor[QueueProcessItem, QueueProcessResultItem]):
 
             scraper_context = execution_item.model.context
 
+            # an aborted run does not leave its jobs waiting
+            if not scraper_context.running:
+                await context.jobs.finish()
+
             message = '\n'.join(scraper_context.info) if len(scraper_context.info) > 0 else (
                 '\n'.join(scraper_context.warnings) if len(scraper_context.warnings) > 0 else (
                     '\n'.join(scraper_context.errors) if len(
@@ -364,12 +387,16 @@ class QueueProcessor(MultiProcessor[QueueProcessItem, QueueProcessResultItem]):
                 "log": scraper_context.log,
                 "warnings": scraper_context.warnings,
                 "reports": scraper_context.reports,
+                "profile": scraper_context.profile.summary(),
+                "trace": scraper_context.profile.tracer.events if scraper_context.profile.tracer is not None else [],
                 "message": message,
                 "slot": slot
             }
 
             return result
         finally:
+            # batches written during the task use its connection
+            await context.jobs.settle()
             if prisma.is_connected():
                 await prisma.disconnect()
 
@@ -400,6 +427,9 @@ class QueueProcessor(MultiProcessor[QueueProcessItem, QueueProcessResultItem]):
         queue_context.reports = merge_dictionaries(
             queue_context.reports, result["reports"]
         )
+        queue_context.profile.merge(result["profile"])
+        if queue_context.profile.tracer is not None:
+            queue_context.profile.tracer.events += result["trace"]
 
         # queue_context.log_progress(result["message"], 1)
 
@@ -0,0 +1,51 @@
+"""
+Spec expressions with `${path}` placeholders (scrapers/omega/expression.py) give
+the same results as when the rendered text was evaluated.
+"""
+
+import unittest
+
+from scrapers.omega.expression import Expression
+
+
+class ExpressionTest(unittest.TestCase):
+
+    def test_bare_placeholder_is_pasted(self):
+        item = {"a": 3, "flag": "True", "name": "Ada"}
+        for source, expected in [("${a} > 2", True), ("-${a}", -3), ("${flag}", True), ("${a} * 2 + 1", 7)]:
+            with self.subTest(source=source):
+                expression = Expression(source)
+                self.assertEqual(expression.evaluate(item), expected)
+                # bound once, not rendered for each record
+                self.assertIsNotNone(expression.code)
+
+    def test_quoted_placeholder_is_text(self):
+        expression = Expression('"${name}" == "Ada" and "${a}" == "3"')
+        self.assertTrue(expression.evaluate({"name": "Ada", "a": 3}))
+        self.assertIsNotNone(expression.code)
+
+    def test_placeholder_in_a_longer_token_is_pasted_as_text(self):
+        item = {"a": 1, "b": 5, "e": 3, "name": "Ada"}
+        for source, expected in [
+            ("${a}.${b}", 1.5),
+            ("${a}0 + 1", 11),
+            ("${a}e${e}", 1000.0),
+            ("${a}${b}", 15),
+            ("${a}_${b}", 15),
+            ("'Hello ${name}' == 'Hello Ada'", True),
+        ]:
+            with self.subTest(source=source):
+                expression = Expression(source)
+                self.assertEqual(expression.evaluate(item), expected)
+                self.assertIsNone(expression.code)
+
+    def test_namespace_of_the_actions(self):
+        item = {"a": 1}
+        for source in ["random.random() < 2", "time.time() > 0", "json.loads('[1]') == [1]",
+                       "re.match('a', 'a') is not None", "datetime.now() - timedelta(days=1) < datetime.now()"]:
+            with self.subTest(source=source):
+                self.assertTrue(Expression(source).evaluate(item))
+
+
+if __name__ == "__main__":
+    unittest.main()
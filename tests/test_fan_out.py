@@ -0,0 +1,185 @@
+"""
+Children of an action run for many records at the same time
+(`execute_children_each` and `execute_children_stream` with a concurrency).
+"""
+
+import asyncio
+import types
+import unittest
+from typing import Any, List
+from unittest import mock
+
+from scrapers.omega.action import OmegaAction, OmegaContext, OmegaItem
+from scrapers.omega.exception import OmegaException
+from scrapers.omega.requests.request_selenium_soup_action import SeleniumRequest
+from scrapers.omega.selenium import cloudflare_human
+from scrapers.omega.selenium.click_action import SeleniumClick
+from scrapers.omega.selenium.cloudflare_human import CloudflareHuman
+
+
+class Record(OmegaAction[Any]):
+    # waits for the delay of the record and fails for the `fail` record
+    def __init__(self, events: List[str], fail: int):
+        super().__init__({"name": "Record"}, {}, {})
+        self.events = events
+        self.fail = fail
+
+    async def _execute(self, omega: OmegaItem):
+        index = omega.item["index"]
+        self.events.append(f"start {index}")
+        await asyncio.sleep(omega.item["delay"])
+        if index == self.fail:
+            raise OmegaException("abort", f"record {index} failed")
+        self.events.append(f"done {index}")
+
+
+class FanOut(OmegaAction[Any]):
+    def __init__(self, events: List[str], fail: int = -1):
+        super().__init__({"name": "Fan out"}, {}, {})
+        self.children = [Record(events, fail)]
+
+    async def _execute(self, omega: OmegaItem):
+        pass
+
+
+class Spec(OmegaAction[Any]):
+    async def init(self):
+        await super().init_children()
+
+    async def _execute(self, omega: OmegaItem):
+        pass
+
+
+class Driver:
+    # tabs of a browser, the last opened tab is current
+    def __init__(self):
+        self.tabs = ["about:blank"]
+        self.current = 0
+        self.switch_to = types.SimpleNamespace(window=self.switch)
+
+    @property
+    def window_handles(self) -> List[int]:
+        return [i for i, url in enumerate(self.tabs) if url is not None]
+
+    @property
+    def current_url(self) -> str:
+        return self.tabs[self.current]
+
+    @property
+    def page_source(self) -> str:
+        return f"<p>{self.current_url}</p>"
+
+    def execute_script(self, script: str):
+        self.tabs.append(script.split('"')[1])
+        self.current = len(self.tabs) - 1
+
+    def switch(self, window_name: int):
+        self.current = window_name
+
+    def close(self):
+        self.tabs[self.current] = None  # type: ignore
+
+
+class App:
+    def __init__(self):
+        self.selenium = types.SimpleNamespace(driver=Driver())
+        self.browser = asyncio.Lock()
+
+    async def archived(self, kind: str, key: Any, compute: Any):
+        return await compute()
+
+    def parse(self, source: str, parser: str, parse_only: Any):
+        return source
+
+
+def records(delays: List[float]) -> List[OmegaItem]:
+    context = OmegaContext(None, None, None)  # type: ignore
+    return [OmegaItem(context, None, {"index": i, "delay": delay}) for i, delay in enumerate(delays)]  # type: ignore
+
+
+async def stream(items: List[OmegaItem]):
+    for item in items:
+        await asyncio.sleep(0)
+        yield item
+
+
+class FanOutTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_runs_every_record(self):
+        events: List[str] = []
+        await FanOut(events).execute_children_each(records([0.02, 0, 0.01, 0, 0]), 3)
+        self.assertEqual(sorted(x for x in events if x.startswith("done")), [f"done {i}" for i in range(5)])
+
+    async def test_failure_lets_running_records_finish(self):
+        # record 2 fails while records 0 and 1 are still waiting
+        for run in ("each", "stream"):
+            with self.subTest(run=run):
+                events: List[str] = []
+                action = FanOut(events, fail=2)
+                items = records([0.05, 0.05, 0.01, 0, 0, 0])
+                with self.assertRaises(OmegaException) as raised:
+                    if run == "each":
+                        await action.execute_children_each(items, 3)
+                    else:
+                        await action.execute_children_stream(stream(items), 3)
+
+                self.assertEqual(raised.exception.message, "record 2 failed")
+                self.assertIn("done 0", events)
+                self.assertIn("done 1", events)
+                # no record starts after the failure
+                self.assertNotIn("start 3", events)
+
+    async def test_cancel_cancels_running_records(self):
+        events: List[str] = []
+        task = asyncio.create_task(FanOut(events).execute_children_each(records([1, 1, 1]), 3))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual([x for x in events if x.startswith("done")], [])
+
+
+class BrowserTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrency_over_the_page_of_the_browser_is_rejected(self):
+        repository: Any = {"jobiq.selenium.click": SeleniumClick, "jobiq.request.selenium.soup": SeleniumRequest}
+        children = [
+            {"name": "Load (jobiq.request.selenium.soup)", "url": "https://a.com/${i}"},
+            {"name": "Click (jobiq.selenium.click)", "selector": "a"}
+        ]
+
+        with self.assertRaises(OmegaException) as raised:
+            await Spec({"name": "Each", "concurrency": 2, "CHILDREN": children}, {}, repository).init()
+        self.assertEqual(raised.exception.severity, "fatal")
+
+        # one record at a time, or a page loaded and read by one action
+        await Spec({"name": "Each", "concurrency": 1, "CHILDREN": children}, {}, repository).init()
+        await Spec({"name": "Each", "concurrency": 2, "CHILDREN": children[0:1]}, {}, repository).init()
+
+    async def test_records_take_turns_with_the_browser(self):
+        action = CloudflareHuman({"name": "Bypass", "timeout": 1}, {}, {})
+        await action.init()
+
+        def verify_success(driver: Any, timeout: float | None = None):
+            # the page is never loaded before, the tab is opened
+            if timeout == 0.5:
+                raise Exception("not loaded")
+        action.verify_success = verify_success  # type: ignore
+
+        app = App()
+        context = OmegaContext(None, None, None)  # type: ignore
+        items = [OmegaItem(context, app, {}) for _ in range(3)]  # type: ignore
+        for i, item in enumerate(items):
+            item.url = f"https://a.com/job/{i}"
+
+        # the human-like pauses are shortened, records still wait on them with the tab open
+        sleep = asyncio.sleep
+        with mock.patch.object(cloudflare_human, "asyncio", types.SimpleNamespace(sleep=lambda delay: sleep(delay / 1000))):
+            await asyncio.gather(*[action._execute(item) for item in items])
+
+        for item in items:
+            self.assertEqual(item.soup, f"<p>{item.url}</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
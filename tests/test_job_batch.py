@@ -0,0 +1,134 @@
+"""
+Jobs of `jobiq.save_job` with a `batch_size`, gathered across the tasks of a worker
+and written when the batch is full, when the worker is idle and when it stops.
+"""
+
+import queue
+import types
+import unittest
+from typing import Any, Dict, List
+from unittest import mock
+
+from api import jobs
+from scrapers import queue as scraper_queue
+from scrapers.omega import save_job_action
+from scrapers.omega.action import AppContext, OmegaContext, OmegaItem
+from scrapers.omega.save_job_action import SaveJob
+
+
+class Database:
+    # jobs written by each transaction, a job with the id "bad" cannot be created
+    def __init__(self):
+        self.writes: List[List[str]] = []
+        self.job = types.SimpleNamespace(create=self.create)
+        self.employer = types.SimpleNamespace(find_many=self.find_many)
+
+    async def find_many(self, **kwargs: Any):
+        return []
+
+    async def create(self, data: Dict[str, Any]):
+        if data["jobId"] == "bad":
+            raise Exception("duplicate job")
+        self.writes.append([data["jobId"]])
+
+    def batch_(self):
+        return Transaction(self)
+
+    def is_connected(self):
+        return True
+
+    async def disconnect(self):
+        pass
+
+
+class Transaction:
+    def __init__(self, database: Database):
+        self.database = database
+        self.created: List[str] = []
+        self.job = types.SimpleNamespace(create=lambda data: self.created.append(data["jobId"]))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args: Any):
+        if "bad" in self.created:
+            raise Exception("duplicate job")
+        self.database.writes.append(self.created)
+
+
+class Tasks:
+    # tasks of the worker, "idle" is a wait without a task
+    def __init__(self, tasks: List[Any]):
+        self.tasks = tasks
+        self.timeouts: List[float | None] = []
+
+    def get(self, timeout: float | None = None):
+        self.timeouts.append(timeout)
+        task = self.tasks.pop(0)
+        if task == "idle":
+            raise queue.Empty()
+        return task
+
+
+class Processor(scraper_queue.QueueProcessor):
+    # every task saves the job of one record, as a record of `jobiq.multiprocessing.start`
+    def __init__(self):
+        super().__init__(None, 1)  # type: ignore
+        self.contexts: List[OmegaContext] = []
+
+    async def process_item(self, process: int, item: Any, context: AppContext) -> Any:
+        action = SaveJob({"name": "Save", "batch_size": 2, "batch_interval": 0.05}, {}, {})
+        await action.init()
+
+        omega_context = OmegaContext(None, types.SimpleNamespace(id=1), None)  # type: ignore
+        self.contexts.append(omega_context)
+        omega = OmegaItem(omega_context, context, {"jobId": item, "Skills": {"Skills": [], "Role": []}})
+        try:
+            await action._execute(omega)
+            return {"slot": process, "succeeded": omega_context.succeeded}
+        finally:
+            await context.jobs.settle()
+
+
+class JobBatchTest(unittest.TestCase):
+
+    def run_worker(self, tasks: Tasks):
+        database = Database()
+
+        async def connect(reconnect: bool = False):
+            return database
+
+        processor = Processor()
+        results: 'queue.Queue[Any]' = queue.Queue()
+        with mock.patch.object(jobs, "connect", connect), \
+                mock.patch.object(save_job_action, "connect", connect), \
+                mock.patch.object(scraper_queue, "connect", connect), \
+                mock.patch.object(SaveJob, "update_processed_job", mock.AsyncMock()) as reported:
+            processor.worker_task(0, tasks, results)  # type: ignore
+
+        return database, processor, reported
+
+    def test_batch_gathers_the_records_of_many_tasks(self):
+        tasks = Tasks(["1", "2", "3", "idle", "4", None])
+        database, _, _ = self.run_worker(tasks)
+
+        # the first two tasks fill the batch, the third waits for the worker to be idle, the last for its stop
+        self.assertEqual(database.writes, [["1", "2"], ["3"], ["4"]])
+        # the worker waits for a task as long as it likes only when it has no job pending
+        self.assertEqual(tasks.timeouts, [None, 0.05, None, 0.05, None, 0.05])
+
+    def test_failed_job_is_reported_on_its_record(self):
+        database, processor, reported = self.run_worker(Tasks(["1", "bad", "3", None]))
+
+        # the batch is written job by job, only the failing record is reported
+        self.assertEqual(database.writes, [["1"], ["3"]])
+        self.assertEqual(reported.await_count, 1)
+        self.assertEqual(reported.await_args.args[0].item["jobId"], "bad")
+
+        context = processor.contexts[1]
+        self.assertEqual((context.succeeded, context.failed), (0, 1))
+        self.assertEqual(processor.contexts[0].failed, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
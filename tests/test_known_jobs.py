@@ -0,0 +1,72 @@
+"""
+Jobs processed before are found in the index of the process or with one query
+of their ids (api/known_jobs.py), without reading the data of their rows.
+"""
+
+import types
+import unittest
+from typing import Any, List
+from unittest import mock
+
+from api.known_jobs import KnownJobs
+from scrapers.omega import filter_processed_jobs_action
+from scrapers.omega.action import OmegaContext, OmegaItem
+from scrapers.omega.filter_processed_jobs_action import FilterProcessedJobs
+
+# processed jobs of scraper 1 and 2
+ROWS = [
+    {"id": 1, "jobId": "a", "scraper": 1},
+    {"id": 2, "jobId": "b", "scraper": 2},
+    {"id": 3, "jobId": "b", "scraper": 1},
+]
+
+
+class Database:
+    # only the raw queries of the ids are answered
+    def __init__(self):
+        self.queries: List[str] = []
+        self.processedjob = types.SimpleNamespace(count=self.count)
+
+    async def count(self):
+        return len(ROWS)
+
+    async def query_raw(self, query: str, *args: Any):
+        self.queries.append(query)
+        if "ANY" in query:
+            return [{"id": x["id"], "jobId": x["jobId"]} for x in ROWS if x["jobId"] in args[0]]
+        if "scraper = $1" in query:
+            return [{"id": x["id"], "jobId": x["jobId"]} for x in ROWS if x["scraper"] == args[0]]
+        return [x for x in ROWS if x["id"] > args[0]]
+
+
+class KnownJobsTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_lookup_gives_the_first_row_of_each_job(self):
+        database = Database()
+        self.assertEqual(await KnownJobs().lookup(database, ["b", "c"]), {"b": 2})  # type: ignore
+        self.assertIn('SELECT id, "jobId" FROM', database.queries[0])
+
+    async def test_filter_removes_processed_jobs(self):
+        database = Database()
+
+        async def connect():
+            return database
+
+        action = FilterProcessedJobs({"name": "Filter", "source_field": "list", "selector": "id"}, {}, {})
+        with mock.patch.object(filter_processed_jobs_action, "connect", connect):
+            await action.init()
+
+        # "b" was processed by this scraper, "a" by another one and "c" is new
+        app = types.SimpleNamespace(known_jobs=KnownJobs())
+        context = OmegaContext(None, types.SimpleNamespace(id=2), None)  # type: ignore
+        omega = OmegaItem(context, app, {"list": [{"id": "a"}, {"id": "b"}, {"id": "c"}]})  # type: ignore
+        await action._execute(omega)
+
+        self.assertEqual(omega.item["list"], [{"id": "c"}])
+        self.assertEqual(context.existing, 2)
+        # only "a" is looked up, by its id
+        self.assertEqual(len([x for x in database.queries if "ANY" in x]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Golden tests of scrapers/markup.py against html_to_markdown and lxml, which it
+reimplements. Each fixture in fixtures/markup is parsed with both parsers:
+
+- every element gives the same markdown as `convert_to_markdown` and the same
+  text as `perfect_string(str(...))`, the way the extractors compared them
+- the fixture element gives the outputs recorded in golden.json, so that a new
+  version of html_to_markdown or lxml that changes them fails here
+- `markdown_text` gives the markdown the extractors stored, without the text that
+  the parse of the escaped markdown lost
+
+After checking the differences of a new version, record its outputs with:
+
+    python -m tests.test_markup
+"""
+
+import json
+import os
+import re
+import sys
+import unittest
+from typing import Any, Dict, List
+
+from bs4 import BeautifulSoup, Tag
+from html_to_markdown import convert_to_markdown
+
+from scrapers.helpers import perfect_string, tidy_string
+from scrapers.markup import markdown_text, to_markdown, to_text
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "markup")
+GOLDEN = os.path.join(FIXTURES, "golden.json")
+PARSERS = ["html.parser", "lxml"]
+
+
+def fixtures() -> List[str]:
+    return sorted(x[:-len(".html")] for x in os.listdir(FIXTURES) if x.endswith(".html"))
+
+
+def elements(name: str, parser: str) -> List[Tag]:
+    # the fixture element first, then its descendants, from a fresh parse
+    with open(os.path.join(FIXTURES, f"{name}.html"), encoding="utf-8") as file:
+        soup = BeautifulSoup(file.read(), parser)
+    body = soup.body if soup.body is not None else soup
+    root = body.find(True)
+    assert root is not None, f"{name} has no element"
+    return [root, *root.find_all(True)]
+
+
+def expected_markdown(name: str, parser: str, index: int) -> str:
+    # convert_to_markdown changes the tree, each element is converted in its own parse
+    return perfect_string(convert_to_markdown(elements(name, parser)[index]))
+
+
+def expected_text(name: str, parser: str, index: int) -> str:
+    return perfect_string(str(elements(name, parser)[index]))
+
+
+def reference(name: str, parser: str) -> Dict[str, Any]:
+    return {
+        "markdown": expected_markdown(name, parser, 0),
+        "text": expected_text(name, parser, 0)
+    }
+
+
+class MarkupTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(GOLDEN, encoding="utf-8") as file:
+            cls.golden = json.load(file)
+
+    def test_fixtures_are_recorded(self):
+        self.assertEqual(sorted(self.golden), fixtures())
+
+    def test_golden(self):
+        for name in fixtures():
+            for parser in PARSERS:
+                with self.subTest(fixture=name, parser=parser):
+                    golden = self.golden[name][parser]
+                    root = elements(name, parser)[0]
+                    self.assertEqual(perfect_string(to_markdown(root)), golden["markdown"])
+                    text = to_text(root)
+                    self.assertEqual(tidy_string(text) if text is not None else perfect_string(str(root)), golden["text"])
+
+    def test_reference_matches_golden(self):
+        # fails when html_to_markdown or lxml changes its output
+        for name in fixtures():
+            for parser in PARSERS:
+                with self.subTest(fixture=name, parser=parser):
+                    self.assertEqual(reference(name, parser), self.golden[name][parser])
+
+    def test_markdown_of_every_element(self):
+        for name in fixtures():
+            for parser in PARSERS:
+                for index, element in enumerate(elements(name, parser)):
+                    with self.subTest(fixture=name, parser=parser, element=index):
+                        self.assertEqual(perfect_string(to_markdown(element)), expected_markdown(name, parser, index))
+
+    def test_text_of_every_element(self):
+        for name in fixtures():
+            for parser in PARSERS:
+                for index, element in enumerate(elements(name, parser)):
+                    text = to_text(element)
+                    if text is None:
+                        # lxml would parse it differently, the extractor falls back to it
+                        continue
+                    with self.subTest(fixture=name, parser=parser, element=index):
+                        self.assertEqual(tidy_string(text), expected_text(name, parser, index))
+
+    def test_markdown_text(self):
+        # without markup, entities or backslashes the parse of the markdown only removed its escapes
+        for name in fixtures():
+            for parser in PARSERS:
+                for index, element in enumerate(elements(name, parser)):
+                    markdown = to_markdown(element)
+                    if re.search(r"[<&]|\\\\", markdown) is not None:
+                        continue
+                    with self.subTest(fixture=name, parser=parser, element=index):
+                        self.assertEqual(markdown_text(element), perfect_string(markdown).replace("\\", ""))
+
+    def test_markdown_text_keeps_markup_and_links(self):
+        for parser in PARSERS:
+            with self.subTest(parser=parser):
+                self.assertEqual(
+                    markdown_text(elements("entities", parser)[0]),
+                    "R&D < 5 years, x<y, AT&amp;T & co. \n\n"
+                    "See https://example. com/jobs?a=1&b=2 or <https://example. com/apply> today.")
+                self.assertEqual(
+                    markdown_text(elements("escaping", parser)[0]),
+                    "C++ & C#, a_b_c, 2*3=6, [brackets], <tag>, back\\slash, `ticks`, ~tilde~, #hash, "
+                    "1.  first, 2) second, - dash, + plus, | pipe, 2024.")
+
+    def test_markdown_keeps_the_page(self):
+        for name in fixtures():
+            for parser in PARSERS:
+                with self.subTest(fixture=name, parser=parser):
+                    root = elements(name, parser)[0]
+                    before = str(root)
+                    to_markdown(root)
+                    markdown_text(root)
+                    to_text(root)
+                    self.assertEqual(str(root), before)
+
+
+def record():
+    golden = {name: {parser: reference(name, parser) for parser in PARSERS} for name in fixtures()}
+    with open(GOLDEN, "w", encoding="utf-8") as file:
+        json.dump(golden, file, indent=2, ensure_ascii=False)
+        file.write("\n")
+    print(f"Recorded {len(golden)} fixtures in {GOLDEN}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    record()
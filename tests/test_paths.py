@@ -0,0 +1,67 @@
+"""
+Dotted paths of the specs (`PathAccessor` in scrapers/helpers.py): keys, list
+positions, wildcards, slices and optional paths.
+"""
+
+import unittest
+
+from scrapers.helpers import compile_path
+from scrapers.omega.exception import OmegaException
+
+ITEM = {
+    "job": {"id": 7, "salary": None},
+    "items": [
+        {"name": "a", "tags": ["x", "y"]},
+        {"name": None, "tags": []},
+        {"tags": ["z"]},
+        None,
+    ],
+    "empty": None,
+}
+
+
+class PathTest(unittest.TestCase):
+
+    def resolve(self, path: str):
+        return compile_path(path).resolve(ITEM)
+
+    def test_keys_and_positions(self):
+        self.assertEqual(self.resolve("job.id"), 7)
+        self.assertEqual(self.resolve("items.0.name"), "a")
+        self.assertEqual(self.resolve("items[-4].tags[1]"), "y")
+        self.assertIsNone(self.resolve("job.salary"))
+
+    def test_missing_parts(self):
+        for path in ["job.title", "items.9.name", "missing.id", "empty.id"]:
+            with self.subTest(path=path):
+                with self.assertRaises(OmegaException):
+                    self.resolve(path)
+                self.assertIsNone(self.resolve(f"?{path}"))
+
+    def test_wildcards_and_slices(self):
+        self.assertEqual(self.resolve("items[0:2].name"), ["a", None])
+        self.assertEqual(self.resolve("items[0:3].tags.*"), [["x", "y"], [], ["z"]])
+        self.assertEqual(self.resolve("job.*"), [7, None])
+        with self.assertRaises(OmegaException):
+            self.resolve("items.*.name")
+
+    def test_null_elements(self):
+        # null values are kept, the elements an optional path does not find are left out
+        self.assertEqual(self.resolve("?items.*.name"), ["a", None])
+        self.assertEqual(self.resolve("?items.*.tags.0"), ["x", "z"])
+        with self.assertRaises(OmegaException):
+            self.resolve("items[1:4].tags")
+
+    def test_optional_wildcard_without_parent_is_empty(self):
+        # whatever is missing along the path, an optional wildcard gives no elements
+        for path in ["?empty.*", "?empty.*.x", "?missing.*.x", "?job.title.*", "?items.9.tags.*",
+                     "?missing[0:2].x", "?items.3.*"]:
+            with self.subTest(path=path):
+                self.assertEqual(self.resolve(path), [])
+
+        with self.assertRaises(OmegaException):
+            self.resolve("missing.*.x")
+
+
+if __name__ == "__main__":
+    unittest.main()